@@ -0,0 +1,381 @@
+import sys
+import mmap
+import struct
+from array import array
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import thompson_from_tree
+from AFDsimulator import convert_to_afd, minimize_afd
+from directAFD import direct_afd
+from reduceAFN import reduce_afn, glushkov_afn
+from stateLimit import DEFAULT_MAX_STATES, check_state_limit, estimate_states
+from compileStats import stage
+
+# Metodos para construir el AFD: subconjuntos sobre el AFN de Thompson, sobre el AFN de Thompson
+# reducido (sin epsilon, ver reduce_afn) o sobre el automata de posiciones, o construccion directa con followpos
+CONSTRUCTIONS = ('thompson', 'reduced', 'glushkov', 'direct')
+
+# Clase que representa un AFD compilado a una tabla de transiciones densa de enteros.
+# Cada fila es un estado y cada columna una clase del alfabeto. La fila 0 es un estado muerto explicito
+# al que van las transiciones no definidas, asi el recorrido no necesita verificar nada por caracter.
+# Los estados se guardan como desplazamientos (fila * columnas) para indexar la tabla con una suma.
+class CompiledAFD:
+
+    def __init__(self, columns, num_columns, table, accept, start, default_column=None, byte_mode=False):
+
+        self.columns = columns                                          # Caracter -> columna de su clase
+        self.num_columns = num_columns                                  # La ultima columna es la de simbolos sin transicion
+        self.default_column = num_columns - 1 if default_column is None else default_column    # Columna de caracteres no listados
+        self.table = table                                              # array('i') con filas * columnas desplazamientos
+        self.fast_table = table.tolist()                                # Copia en lista para el recorrido (evita crear enteros por acceso)
+        self.accept = accept                                            # Bitmap de estados de aceptacion (por fila)
+        self.start = start                                              # Desplazamiento del estado inicial
+        self.num_states = len(table) // self.num_columns
+        self.byte_mode = byte_mode                                      # True si el alfabeto son bytes UTF-8 (ver utf8Automaton)
+        self.byte_map = self.build_byte_map()
+
+
+    # Al serializar (por ejemplo, para enviarlo a otros procesos) solo se guarda la tabla compacta;
+    # las estructuras derivadas se reconstruyen al cargar
+    def __getstate__(self):
+
+        state = self.__dict__.copy()
+        del state['fast_table'], state['byte_map']
+        return state
+
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        self.fast_table = self.table.tolist()
+        self.byte_map = self.build_byte_map()
+
+
+    # Construye la tabla de traduccion byte -> columna usada con bytes.translate.
+    # Los bytes se interpretan como latin-1, es decir, el byte b es el caracter chr(b).
+    def build_byte_map(self):
+
+        if self.num_columns > 256:
+            return None
+        return bytes(self.columns.get(chr(b), self.default_column) for b in range(256))
+
+
+    # Indica si el estado dado (desplazamiento) es de aceptacion
+    def is_accepting(self, state):
+
+        row = state // self.num_columns
+        return bool(self.accept[row >> 3] >> (row & 7) & 1)
+
+
+    # Traduce la entrada a una secuencia de columnas. Para texto latin-1 y bytes se hace en C
+    # con translate; en otro caso se busca cada caracter en el mapa de columnas.
+    # En un automata de bytes el texto se codifica en UTF-8 y los bytes se usan sin decodificar.
+    def to_columns(self, data):
+
+        if isinstance(data, str) and self.byte_mode:
+            data = data.encode('utf-8')
+
+        if isinstance(data, str):
+            if self.byte_map is not None:
+                try:
+                    return data.encode('latin-1').translate(self.byte_map)
+                except UnicodeEncodeError:
+                    pass
+            columns = self.columns
+            default = self.default_column
+            return [columns.get(symbol, default) for symbol in data]
+
+        if self.byte_map is not None:
+            return bytes(data).translate(self.byte_map)
+        columns = self.columns
+        default = self.default_column
+        return [columns.get(chr(b), default) for b in bytes(data)]
+
+
+    # Recorre la tabla desde el estado dado con una secuencia de columnas y retorna el estado alcanzado
+    def run(self, state, columns):
+
+        table = self.fast_table
+        for column in columns:
+            state = table[state + column]
+        return state
+
+
+    # Retorna True si el AFD compilado acepta la cadena (str, bytes, bytearray o memoryview)
+    def accepts(self, data):
+
+        return self.is_accepting(self.run(self.start, self.to_columns(data)))
+
+
+
+    # Serializa el AFD compilado al formato binario compacto (ver FORMAT_VERSION)
+    def to_bytes(self):
+
+        symbols = b''.join(encode_symbol(symbol, column) for symbol, column in self.columns.items())
+        symbols += bytes(-len(symbols) % 4)     # Alinear la tabla a 4 bytes
+
+        table = array('i', self.table)
+        if sys.byteorder == 'big':
+            table.byteswap()
+
+        flags = FLAG_BYTE_MODE if self.byte_mode else 0
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(self.columns), self.num_states,
+                             self.num_columns, self.start, self.default_column, len(symbols))
+        return header + symbols + table.tobytes() + bytes(self.accept)
+
+
+    # Reconstruye un AFD compilado a partir de su formato binario (copiando la tabla)
+    @staticmethod
+    def from_bytes(data):
+
+        columns, num_columns, start, default_column, table_view, accept_view, flags = read_sections(memoryview(data))
+
+        table = array('i')
+        table.frombytes(table_view)
+        if sys.byteorder == 'big':
+            table.byteswap()
+
+        return CompiledAFD(columns, num_columns, table, bytearray(accept_view), start, default_column,
+                           bool(flags & FLAG_BYTE_MODE))
+
+
+    # Guarda el AFD compilado en un archivo con el formato binario
+    def save(self, path):
+
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+
+
+# Clase que representa un AFD compilado leido con mmap desde un archivo en el formato binario.
+# La tabla y el mapa de aceptacion se usan directamente sobre el buffer mapeado, sin copiarlos,
+# de modo que varios procesos que cargan el mismo archivo comparten una sola copia fisica
+# a traves del cache de paginas del sistema operativo.
+class MappedAFD(CompiledAFD):
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        columns, num_columns, start, default_column, table_view, accept_view, flags = read_sections(memoryview(self.mmap))
+
+        self.columns = columns
+        self.num_columns = num_columns
+        self.default_column = default_column
+        self.start = start
+        self.accept = accept_view
+
+        # La tabla en disco es little endian; solo en maquinas big endian se necesita una copia
+        if sys.byteorder == 'little':
+            self.table = table_view.cast('i')
+        else:
+            self.table = array('i')
+            self.table.frombytes(table_view)
+            self.table.byteswap()
+        self.num_states = len(self.table) // self.num_columns
+        self.byte_mode = bool(flags & FLAG_BYTE_MODE)
+        self.fast_table = self.table
+        self.byte_map = self.build_byte_map()
+
+
+    # Al enviarlo a otro proceso solo se envia la ruta; el otro proceso vuelve a mapear el archivo
+    def __getstate__(self):
+
+        return {'path': self.path}
+
+
+    def __setstate__(self, state):
+
+        self.__init__(state['path'])
+
+
+    # Libera el buffer mapeado
+    def close(self):
+
+        if isinstance(self.table, memoryview):
+            self.table.release()
+        self.accept.release()
+        self.fast_table = self.table = self.accept = None
+        self.mmap.close()
+
+
+
+# Separa las secciones del formato binario sin copiarlas.
+# Retorna el mapa de columnas, el numero de columnas, el desplazamiento inicial, la columna por defecto
+# y las vistas de la tabla y del mapa de aceptacion, ademas de las banderas del encabezado.
+def read_sections(data):
+
+    if len(data) < HEADER.size:
+        raise ValueError("Archivo de AFD compilado incompleto")
+    magic, version, flags, num_symbols, num_states, num_columns, start, default_column, symbols_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Formato de AFD compilado no soportado")
+
+    offset = HEADER.size
+    columns = decode_symbols(data[offset:offset + symbols_size], num_symbols)
+    offset += symbols_size
+
+    table_size = 4 * num_states * num_columns
+    accept_size = (num_states + 7) // 8
+    if len(data) < offset + table_size + accept_size:
+        raise ValueError("Archivo de AFD compilado incompleto")
+
+    table_view = data[offset:offset + table_size]
+    accept_view = data[offset + table_size:offset + table_size + accept_size]
+    return columns, num_columns, start, default_column, table_view, accept_view, flags
+
+
+
+# Formato binario de un AFD compilado (little endian):
+#   encabezado: magic, version, banderas (FLAG_BYTE_MODE), numero de simbolos, estados, columnas,
+#               desplazamiento inicial, columna por defecto y tamaño de la seccion de simbolos
+#   simbolos:   por cada caracter su columna (u32), su longitud (u32) y su texto en UTF-8, alineado a 4 bytes
+#   tabla:      estados * columnas enteros de 32 bits (desplazamientos)
+#   aceptacion: mapa de bits de estados de aceptacion
+MAGIC = b'AFDT'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sHHIIIIII')
+FLAG_BYTE_MODE = 1
+
+
+# Codifica un caracter del mapa de columnas como columna + longitud + texto UTF-8
+def encode_symbol(symbol, column):
+
+    encoded = symbol.encode('utf-8')
+    return struct.pack('<II', column, len(encoded)) + encoded
+
+
+# Decodifica la seccion de simbolos del formato binario en el mapa caracter -> columna.
+# Si la seccion esta cortada o no es UTF-8 valido se lanza ValueError.
+def decode_symbols(data, count):
+
+    columns = {}
+    offset = 0
+    for _ in range(count):
+        if len(data) < offset + 8:
+            raise ValueError("Archivo de AFD compilado incompleto")
+        column, length = struct.unpack_from('<II', data, offset)
+        offset += 8
+        if len(data) < offset + length:
+            raise ValueError("Archivo de AFD compilado incompleto")
+        columns[bytes(data[offset:offset + length]).decode('utf-8')] = column
+        offset += length
+    return columns
+
+
+# Compila un AFD (de convert_to_afd o minimize_afd) a una tabla de transiciones densa indexada por
+# clase del alfabeto. Los caracteres de una misma clase comparten columna.
+def compile_afd(afd):
+
+    # Recopilar las clases de todas las transiciones, una columna por clase
+    symbols = set()
+    for state in afd.states:
+        symbols.update(state.transitions.keys())
+    symbols = sorted(symbols, key=str)
+
+    num_columns = len(symbols) + 1
+    dead_column = num_columns - 1
+    key_columns = {s: i for i, s in enumerate(symbols)}
+
+    # Mapa caracter -> columna; las clases sin transiciones van a la columna muerta
+    if afd.alphabet:
+        columns = {char: key_columns.get(key, dead_column) for char, key in afd.alphabet.char_keys.items()}
+        default_column = key_columns.get(afd.alphabet.other_key, dead_column)
+    else:
+        columns = key_columns
+        default_column = dead_column
+
+    # Fila 0 es el estado muerto; los estados del AFD ocupan las filas 1..n
+    rows = {state: i + 1 for i, state in enumerate(afd.states)}
+    table = array('i', [0]) * (num_columns * (len(rows) + 1))
+    accept = bytearray((len(rows) + 1 + 7) // 8)
+
+    for state, row in rows.items():
+        for symbol, next_state in state.transitions.items():
+            table[row * num_columns + key_columns[symbol]] = rows[next_state] * num_columns
+        if state.is_final:
+            accept[row >> 3] |= 1 << (row & 7)
+
+    return CompiledAFD(columns, num_columns, table, accept, rows[afd.start_state] * num_columns, default_column)
+
+
+# Simula el AFD compilado para una cadena de entrada dada
+def simulate_compiled_afd(compiled, input_string):
+
+    return compiled.accepts(input_string)
+
+
+# Construye el AFN de un arbol sintactico con el metodo dado: 'thompson', 'reduced' (Thompson sin
+# transiciones epsilon ni estados redundantes) o 'glushkov' (automata de posiciones).
+# Con stats (CompileStats) se mide cada etapa y se registran los tamaños de los automatas.
+def build_afn(root, construction='thompson', stats=None):
+
+    if construction == 'glushkov':
+        with stage(stats, 'glushkov_afn'):
+            afn = glushkov_afn(root)
+    elif construction in ('thompson', 'reduced'):
+        with stage(stats, 'thompson_from_tree'):
+            afn = thompson_from_tree(root)
+        if construction == 'reduced':
+            with stage(stats, 'reduce_afn'):
+                return reduce_afn(afn, stats)
+    else:
+        raise ValueError(f"Metodo de construccion desconocido: {construction}")
+
+    if stats is not None:
+        afn_states, afn_edges = afn.size()
+        stats.size('afn_states', afn_states)
+        stats.size('afn_edges', afn_edges)
+    return afn
+
+
+# Construye el AFD (sin minimizar) de un arbol sintactico con el metodo dado (ver CONSTRUCTIONS).
+# Antes de construir se estima el tamaño del AFN (con las repeticiones expandidas); si la estimacion
+# o el AFD superan max_states se lanza StateLimitError, asi una expresion no puede colgar el proceso.
+# Con stats (CompileStats) se mide cada etapa y se registran los tamaños de los automatas.
+def build_afd(root, construction='thompson', max_states=DEFAULT_MAX_STATES, stats=None):
+
+    estimate = estimate_states(root)
+    if stats is not None:
+        stats.size('estimated_afn_states', estimate)
+    check_state_limit(estimate, max_states)
+
+    if construction == 'direct':
+        with stage(stats, 'direct_afd'):
+            return direct_afd(root, max_states, stats)
+    afn = build_afn(root, construction, stats)
+    with stage(stats, 'convert_to_afd'):
+        return convert_to_afd(afn, max_states, stats)
+
+
+# Ejecuta todo el proceso de compilacion (postfix, arbol, AFN, AFD, minimizacion) para una expresion infix.
+# Con utf8=True el resultado es un automata sobre bytes UTF-8 (ver utf8Automaton).
+# construction es el metodo para construir el AFD (ver CONSTRUCTIONS); con 'direct' no se pasa por un AFN.
+# max_states limita la cantidad de estados (ver build_afd).
+# Con stats (CompileStats) se registran el tiempo de cada etapa, los contadores y los tamaños.
+def compile_regex(infix, utf8=False, construction='thompson', max_states=DEFAULT_MAX_STATES, stats=None):
+
+    converter = ShuntingYard()
+    with stage(stats, 'formatRegEx'):
+        tokens = converter.formatRegEx(infix)
+    with stage(stats, 'infixToPostfix'):
+        postfix = converter.tokensToPostfix(tokens)
+    with stage(stats, 'build_tree'):
+        root = SyntaxTree().build_tree(postfix)
+    afd = build_afd(root, construction, max_states, stats)
+    with stage(stats, 'minimize_afd'):
+        afd = minimize_afd(afd, stats=stats)
+
+    if utf8:
+        from utf8Automaton import compile_utf8_afd
+        with stage(stats, 'compile_utf8_afd'):
+            compiled = compile_utf8_afd(afd)
+    else:
+        with stage(stats, 'compile_afd'):
+            compiled = compile_afd(afd)
+    if stats is not None:
+        stats.size('table_states', compiled.num_states)
+        stats.size('table_columns', compiled.num_columns)
+    return compiled
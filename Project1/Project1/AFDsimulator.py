@@ -1,4 +1,7 @@
 from graphviz import Digraph
+from charClass import AlphabetPartition
+from stateLimit import check_state_limit
+from compileStats import PROGRESS_INTERVAL
 
 # Clase para representar un Automata Finito Determinista (AFD).
 class AFD:
@@ -9,6 +12,7 @@ class AFD:
         self.states = []            # Lista de estados en el AFD
         self.start_state = None     # Estado inicial del AFD
         self.end_states = []        # Lista de estados finales del AFD
+        self.alphabet = None        # Particion del alfabeto en clases (AlphabetPartition), si se uso
 
 
     # Agrega un estado al AFD
@@ -39,7 +43,7 @@ class AFD:
                 # Recorrer cada transicion del estado
                 for symbol, next_state in state.transitions.items():
                     # Agregar una arista en el grafo para representar la transicion
-                    dot.edge(str(id(state)), str(id(next_state)), label=symbol)
+                    dot.edge(str(id(state)), str(id(next_state)), label=str(symbol))
             
             # devolver el grafo
             return dot
@@ -86,10 +90,16 @@ def epsilon_closure(states):
     return epsilon_closure
 
 
-# Convierte un AFN dado a un AFD mediante el algoritmo de construccion de subconjuntos
-def convert_to_afd(afn):
+# Convierte un AFN dado a un AFD mediante el algoritmo de construccion de subconjuntos.
+# Antes se divide el alfabeto en clases de equivalencia, de modo que el AFD tiene una transicion
+# por clase (un caracter o un conjunto de caracteres) en lugar de una por caracter.
+# Si el AFD supera max_states estados se lanza StateLimitError (None es sin limite).
+# Con stats (CompileStats) se cuentan los cierres epsilon y las transiciones, y se informa el avance.
+def convert_to_afd(afn, max_states=None, stats=None):
     
     afd = AFD() # Crear un nuevo objecto AFD
+    alphabet = AlphabetPartition.from_afn(afn)
+    afd.alphabet = alphabet
 
     # Obtener el cierre epsilon del estado inicial del AFN
     initial_afn_states = epsilon_closure(set([afn.start_state]))
@@ -99,50 +109,63 @@ def convert_to_afd(afn):
     afd.start_state = initial_afd_state     # Establecer como estado inicial del AFD
     afd.add_state(initial_afd_state)        # Agregar al AFD
 
+    # Indice de subconjuntos del AFN a estados del AFD, para busquedas en tiempo constante
+    afd_states_index = {frozenset(initial_afn_states): initial_afd_state}
+
     unprocessed_states = [initial_afd_state]    # Lista de estados sin procesar
     counter = 2     # Contador para asignar numeros de estado
+    closures = 1    # Cierres epsilon calculados
+    closure_states = len(initial_afn_states)    # Suma de los tamaños de los cierres
+    transitions = 0
 
     # Mientras haya estados sin procesar
     while unprocessed_states:
         # Tomar un estado sin procesar
         current_afd_state = unprocessed_states.pop()
 
-        symbols = set() # Conjunto para almacenar simbolos de transicion
-        
-        # Recopilar todos los simbolos de transicion de los estados del AFN correspondientes
-        for afn_state in current_afd_state.afn_states:
-            symbols.update(afn_state.transitions.keys())
-
-        # Eliminar transiciones epsilon (None o ε)
-        if None in symbols or 'ε' in symbols:
-            symbols.remove(None)
+        moves = {} # Clase del alfabeto -> estados del AFN alcanzables con ella
 
-        # Para cada simbolo de transicion
-        for symbol in symbols:
-            new_afn_states = set() # Conjunto para nuevos estados del AFN
-            
-            # Obtener todos los estados del AFN alcanzables con el simbolo actual
-            for afn_state in current_afd_state.afn_states:
-                if symbol in afn_state.transitions:
-                    new_afn_states.update(afn_state.transitions[symbol])
-            
+        # Recopilar las transiciones de los estados del AFN correspondientes, omitiendo las epsilon (None)
+        for afn_state in current_afd_state.afn_states:
+            for label, targets in afn_state.transitions.items():
+                if label is None:
+                    continue
+                for symbol in alphabet.keys_for(label):
+                    moves.setdefault(symbol, set()).update(targets)
+
+        # Para cada clase de simbolos con transicion
+        for symbol, new_afn_states in moves.items():
             # Obtener el cierre epsilon de los nuevos estados del AFN
             new_afn_states = epsilon_closure(new_afn_states)
+            closures += 1
+            closure_states += len(new_afn_states)
+            transitions += 1
 
-             # Verificar si el nuevo conjunto de estados del AFN ya existe en el AFD
-            existing_state = next((state for state in afd.states if state.afn_states == new_afn_states), None)
+            # Verificar si el nuevo conjunto de estados del AFN ya existe en el AFD
+            key = frozenset(new_afn_states)
+            existing_state = afd_states_index.get(key)
             
-            # Si no existe, crear un nuevo estado en el AFD
+            # Si no existe, crear un nuevo estado en el AFD y registrarlo en el indice
             if existing_state is None:
                 new_afd_state = AFDState(new_afn_states)
                 new_afd_state.state_number = counter 
                 counter += 1
                 afd.add_state(new_afd_state)
+                check_state_limit(len(afd.states), max_states)
+                if stats is not None and len(afd.states) % PROGRESS_INTERVAL == 0:
+                    stats.progress('afd_states', len(afd.states))
+                afd_states_index[key] = new_afd_state
                 unprocessed_states.append(new_afd_state)
                 current_afd_state.add_transition(symbol, new_afd_state)
             # Si existe, agregar una transición al estado existente
             else:
                 current_afd_state.add_transition(symbol, existing_state)
+
+    if stats is not None:
+        stats.count('epsilon_closure_calls', closures)
+        stats.count('epsilon_closure_states', closure_states)
+        stats.count('afd_transitions', transitions)
+        stats.size('afd_states', len(afd.states))
     
     # retornar el afd resultante
     return afd
@@ -152,9 +175,13 @@ def convert_to_afd(afn):
 def simulate_afd(afd, input_string):
     
         current_state = afd.start_state # Iniciar en el estado inicial del AFD
+        classify = afd.alphabet.classify if afd.alphabet else None
 
         # Para cada simbolo en la cadena de entrada
         for symbol in input_string:
+            # Traducir el caracter a la clase del alfabeto que lo contiene
+            if classify:
+                symbol = classify(symbol)
              # Si hay una transicion definida para el simbolo actual
             if symbol in current_state.transitions:
                 next_state = current_state.transitions[symbol]
@@ -167,17 +194,37 @@ def simulate_afd(afd, input_string):
         return current_state.is_final
 
 
-# Minimizacion de un AFD dado utilizando el algoritmo de particiones (minimizacion de estados)
-def minimize_afd(afd):
+# Minimizacion de un AFD dado. Por defecto usa el algoritmo de Hopcroft,
+# method='moore' usa el refinamiento por rondas original como referencia.
+# accept_key permite distinguir estados de aceptacion entre si (ver initial_groups)
+# Con stats (CompileStats) se cuentan las rondas de refinamiento.
+def minimize_afd(afd, method='hopcroft', accept_key=None, stats=None):
+
+    if method == 'hopcroft':
+        partitions = hopcroft_partitions(afd, accept_key, stats)
+    elif method == 'moore':
+        partitions = moore_partitions(afd, accept_key, stats)
+    else:
+        raise ValueError(f"Metodo de minimizacion desconocido: {method}")
+
+    minimized_afd = build_minimized_afd(afd, partitions)
+    if stats is not None:
+        stats.size('min_afd_states', len(minimized_afd.states))
+    return minimized_afd
+
+
+# Calcula las particiones de estados equivalentes con el algoritmo de particiones de Moore, O(n^2) por ronda
+def moore_partitions(afd, accept_key=None, stats=None):
 
     # Inicializar particiones con estados finales y no finales
-    partitions = [set(filter(lambda s: s.is_final, afd.states)),
-                  set(filter(lambda s: not s.is_final, afd.states))]
+    partitions = [set(group) for group in initial_groups(afd.states, accept_key).values()]
 
     changed = True # Bandera para indicar si las particiones cambiaron
+    rounds = 0
     
     while changed:
         changed = False         # Reiniciar la bandera
+        rounds += 1
         new_partitions = []     # Lista para nuevas particiones
         
         # Para cada particion existente
@@ -193,7 +240,7 @@ def minimize_afd(afd):
                     # Encontrar la particion a la que pertenece el estado siguiente
                     partition_index = next((i for i, p in enumerate(partitions) if next_state in p), -1)
                     key_elements.append((symbol, partition_index))
-                key = tuple(sorted(key_elements)) # Crear una clave unica para el grupo
+                key = frozenset(key_elements) # Crear una clave unica para el grupo (las clases no se pueden ordenar)
 
 
                 # Agregar el estado al grupo correspondiente
@@ -211,8 +258,128 @@ def minimize_afd(afd):
             
         partitions = new_partitions # Actualizar las particiones
 
+    if stats is not None:
+        stats.count('refinement_rounds', rounds)
+    return partitions
+
+
+# Calcula las particiones de estados equivalentes con el algoritmo de Hopcroft, O(n log n).
+# El AFD se completa con un estado muerto explicito para que las transiciones faltantes
+# se refinen correctamente; los estados equivalentes al estado muerto se descartan.
+def hopcroft_partitions(afd, accept_key=None, stats=None):
+
+    states = afd.states
+    dead = len(states)  # Indice del estado muerto agregado
+    index = {state: i for i, state in enumerate(states)}
+
+    symbols = set()
+    for state in states:
+        symbols.update(state.transitions.keys())
+
+    # Transiciones inversas: para cada simbolo, destino -> lista de origenes
+    inverse = {symbol: [[] for _ in range(dead + 1)] for symbol in symbols}
+    for i, state in enumerate(states):
+        for symbol in symbols:
+            next_state = state.transitions.get(symbol)
+            target = dead if next_state is None else index[next_state]
+            inverse[symbol][target].append(i)
+    for symbol in symbols:
+        inverse[symbol][dead].append(dead)
+
+    # Particion inicial: estados finales y no finales; el estado muerto va con los no finales
+    groups = initial_groups(range(dead), accept_key and (lambda i: accept_key(states[i])),
+                            lambda i: states[i].is_final)
+    groups.setdefault(False, []).append(dead)
+    blocks = [set(b) for b in groups.values()]              # Bloques de la particion
+    block_of = [0] * (dead + 1)                               # Estado -> indice de bloque
+    for b, block in enumerate(blocks):
+        for i in block:
+            block_of[i] = b
+
+    # Lista de trabajo con los pares (bloque, simbolo) pendientes de usar como divisores:
+    # todos los bloques iniciales excepto el mas grande
+    largest = max(range(len(blocks)), key=lambda b: len(blocks[b]))
+    worklist = [(b, symbol) for b in range(len(blocks)) if b != largest for symbol in symbols]
+    pending = set(worklist)
+    rounds = 0      # Divisores procesados
+    splits = 0      # Bloques divididos
+
+    while worklist:
+        rounds += 1
+        splitter = worklist.pop()
+        pending.discard(splitter)
+        b, symbol = splitter
+
+        # Estados con transicion sobre el simbolo hacia el bloque divisor
+        predecessors = {}
+        for target in blocks[b]:
+            for source in inverse[symbol][target]:
+                predecessors.setdefault(block_of[source], []).append(source)
+
+        # Dividir en el lugar cada bloque que queda parcialmente cubierto
+        for y, inside in predecessors.items():
+            block = blocks[y]
+            if len(inside) == len(block):
+                continue
+
+            # El nuevo bloque es siempre la parte mas pequeña
+            if len(inside) <= len(block) // 2:
+                moved = set(inside)
+            else:
+                moved = block.difference(inside)
+            block.difference_update(moved)
+            splits += 1
+            new_b = len(blocks)
+            blocks.append(moved)
+            for i in moved:
+                block_of[i] = new_b
+
+            # Actualizar la lista de trabajo
+            for c in symbols:
+                if (y, c) not in pending:
+                    item = (new_b if len(moved) <= len(block) else y, c)
+                else:
+                    item = (new_b, c)
+                pending.add(item)
+                worklist.append(item)
+
+    if stats is not None:
+        stats.count('refinement_rounds', rounds)
+        stats.count('refinement_splits', splits)
+
+    # Descartar el bloque del estado muerto, salvo que contenga al estado inicial
+    dead_block = block_of[dead]
+    start_block = block_of[index[afd.start_state]]
+    partitions = []
+    for b in sorted(range(len(blocks)), key=lambda b: min(blocks[b])):
+        if b == dead_block and b != start_block:
+            continue
+        partition = {states[i] for i in blocks[b] if i != dead}
+        if partition:
+            partitions.append(partition)
+
+    return partitions
+
+
+# Agrupa los estados para la particion inicial de la minimizacion. Sin accept_key se separan
+# finales y no finales; con accept_key(estado) se separan los estados de aceptacion por su clave
+# (por ejemplo, el conjunto de patrones que aceptan). Los no finales siempre quedan bajo la clave False.
+def initial_groups(states, accept_key=None, is_final=lambda s: s.is_final):
+
+    groups = {}
+    for state in states:
+        key = (accept_key(state) if accept_key else True) if is_final(state) else False
+        groups.setdefault(key, []).append(state)
+    return groups
+
+
+# Construye el AFD minimizado a partir de las particiones de estados equivalentes.
+# El AFD resultante tiene un estado por particion, en el mismo orden que las particiones.
+def build_minimized_afd(afd, partitions):
+
     # Crear un nuevo AFD minimizado
     minimized_afd = AFD()
+    minimized_afd.alphabet = afd.alphabet
     state_mapping = {}  # Diccionario para mapear estados antiguos a nuevos
     
     # Para cada particion, crear un nuevo estado en el AFD minimizado
@@ -228,7 +395,9 @@ def minimize_afd(afd):
     # Mapear las transiciones de los estados antiguos a los estados nuevos
     for old_state, new_state in state_mapping.items():
         for symbol, next_old_state in old_state.transitions.items():
-            new_state.add_transition(symbol, state_mapping[next_old_state])
+            # Las transiciones hacia estados descartados (equivalentes al estado muerto) se omiten
+            if next_old_state in state_mapping:
+                new_state.add_transition(symbol, state_mapping[next_old_state])
     
     # Establecer el estado inicial del AFD minimizado
     minimized_afd.start_state = state_mapping[afd.start_state]
@@ -1,8 +1,13 @@
 from graphviz import Digraph
+from charClass import CharClass, EPSILON
+from repetition import Repetition
 
 # Clase para representar un estado en un AFN (Automata Finito No determinista).
+# Se usa __slots__ para reducir la memoria de los AFN con muchos estados.
 class State:
     
+    __slots__ = ('transitions', 'is_final', 'state_number')
+
     state_counter = 0 # Contador para asignar numeros a los estados
 
     def __init__(self):
@@ -27,11 +32,16 @@ class State:
 class AFN:
 
     # Inicializacion de un AFN nuevo-
-    def __init__(self, start=None, end=None):
+    # Con multiple_finals=True el AFN no tiene un estado final unico: end_state es None y los estados
+    # finales son los marcados con is_final (por ejemplo, los AFN sin epsilon de reduceAFN).
+    def __init__(self, start=None, end=None, multiple_finals=False):
       
         self.start_state = start if start else State()
-        self.end_state = end if end else State()
-        self.end_state.is_final = True
+        if multiple_finals:
+            self.end_state = None
+        else:
+            self.end_state = end if end else State()
+            self.end_state.is_final = True
     
 
     # Asignar numeros de estado de forma dinamica
@@ -62,6 +72,9 @@ class AFN:
     # Conectar el estado final de este AFN al estado inicial de otro AFN con un simbolo dado (por defecto es ε)
     def connect_to(self, other_nfa, symbol=None):
 
+        if self.end_state is None:
+            raise ValueError("El AFN no tiene un estado final unico para conectarlo")
+
         # Agregar una transicion desde el estado final de este AFN al estado inicial del otro AFN
         self.end_state.add_transition(symbol, other_nfa.start_state)
 
@@ -80,59 +93,139 @@ class AFN:
         return AFN(start, end)
 
 
-    # Visualiza el AFN usando la libreria Graphviz
+    # Retorna la cantidad de estados y de transiciones alcanzables desde el estado inicial
+    def size(self):
+
+        visited = {self.start_state}
+        states_to_visit = [self.start_state]
+        edges = 0
+        while states_to_visit:
+            current_state = states_to_visit.pop()
+            for next_states in current_state.transitions.values():
+                edges += len(next_states)
+                for next_state in next_states:
+                    if next_state not in visited:
+                        visited.add(next_state)
+                        states_to_visit.append(next_state)
+        return len(visited), edges
+
+
+    # Retorna la lista de estados finales alcanzables desde el estado inicial
+    def final_states(self):
+
+        visited = {self.start_state}
+        states_to_visit = [self.start_state]
+        finals = []
+        while states_to_visit:
+            current_state = states_to_visit.pop()
+            if current_state.is_final:
+                finals.append(current_state)
+            for next_states in current_state.transitions.values():
+                for next_state in next_states:
+                    if next_state not in visited:
+                        visited.add(next_state)
+                        states_to_visit.append(next_state)
+        return finals
+
+
+    # Crea una copia independiente del AFN, con estados nuevos y las mismas transiciones
+    def copy(self):
+
+        copies = {self.start_state: State()}
+        states_to_visit = [self.start_state]
+        while states_to_visit:
+            current_state = states_to_visit.pop()
+            copy = copies[current_state]
+            copy.is_final = current_state.is_final
+            for symbol, next_states in current_state.transitions.items():
+                for next_state in next_states:
+                    if next_state not in copies:
+                        copies[next_state] = State()
+                        states_to_visit.append(next_state)
+                    copy.add_transition(symbol, copies[next_state])
+
+        if self.end_state is None:
+            return AFN(copies[self.start_state], multiple_finals=True)
+        return AFN(copies[self.start_state], copies.get(self.end_state))
+
+
+    # Visualiza el AFN usando la libreria Graphviz. Cada estado se agrega una sola vez, al
+    # descubrirlo, y despues sus transiciones; las transiciones epsilon se etiquetan con 'ε'.
     def visualize_afn(self):
-    
+
         dot = Digraph()                         # Crear un nuevo grafo dirigido
         states_to_visit = [self.start_state]    # Lista de estados por visitar.
-        visited_states = set()                  # Conjunto de estados ya visitados
+        visited_states = {self.start_state}     # Conjunto de estados ya descubiertos
 
         # Mientras haya estados por visitar
         while states_to_visit:
             # Tomar un estado de la lista
             current_state = states_to_visit.pop()
 
-            # Agregar nodos y aristas al grafo
+            # Agregar el nodo con la etiqueta y la forma adecuadas
+            label = str(current_state.state_number)
+            if current_state == self.start_state:
+                label = f"Inicio ({label})"
+            elif current_state.is_final:
+                label = f"Fin ({label})"
+            dot.node(str(id(current_state)), label=label,
+                     shape="doublecircle" if current_state.is_final else "ellipse")
+
+            # Agregar las aristas y los estados siguientes que no se han descubierto
             for symbol, next_states in current_state.transitions.items():
                 for next_state in next_states:
-                    # Agregar nodos con etiquetas y formas adecuadas
-                    if current_state == self.start_state:
-                        dot.node(str(id(current_state)), label=f"Inicio ({current_state.state_number})", shape="ellipse")
-                    else:
-                        dot.node(str(id(current_state)), label=str(current_state.state_number), shape="ellipse")
-
-                    if next_state.is_final and next_state == self.end_state:
-                        dot.node(str(id(next_state)), label=f"Fin ({next_state.state_number})", shape="doublecircle")
-                    else:
-                        dot.node(str(id(next_state)), label=str(next_state.state_number), shape="ellipse")
-
-                    # Agregar aristas con etiquetas adecuadas
-                    dot.edge(str(id(current_state)), str(id(next_state)), label=symbol if symbol else 'ε')
-
-                    # Agregar el estado siguiente a la lista de estados por visitar si no ha sido visitado
+                    dot.edge(str(id(current_state)), str(id(next_state)), label=str(symbol) if symbol else 'ε')
                     if next_state not in visited_states:
+                        visited_states.add(next_state)
                         states_to_visit.append(next_state)
 
-            # Marcar el estado actual como visitado
-            visited_states.add(current_state)
-
         # Retornar el grafo
         return dot
 
 
 
 
-# Construir un AFN a partir de un nodo de árbol sintáctico usando la construcción de Thompson
+# Construir un AFN a partir de un nodo de árbol sintáctico usando la construcción de Thompson.
+# El arbol se recorre en postorden con una pila explicita (sin recursion), asi las expresiones
+# con miles de simbolos no agotan el limite de recursion de Python.
 def thompson_from_tree(node):
 
-    # Si el nodo es un literal construye un AFN para la literal
-    if not node.children:
+    nfas = []                           # Pila de AFN ya construidos para los subarboles
+    nodes_to_visit = [(node, False)]    # Pila de (nodo, hijos ya visitados)
+
+    while nodes_to_visit:
+        node, expanded = nodes_to_visit.pop()
+        # Visitar primero los hijos, de izquierda a derecha
+        if node.children and not expanded:
+            nodes_to_visit.append((node, True))
+            for child in reversed(node.children):
+                nodes_to_visit.append((child, False))
+            continue
+
+        # Los AFN de los hijos son los ultimos de la pila
+        count = len(node.children)
+        children = nfas[len(nfas) - count:]
+        del nfas[len(nfas) - count:]
+        nfas.append(thompson_step(node.value, children))
+
+    return nfas[0]
+
+
+# Construir el AFN de un nodo a partir del valor del nodo y los AFN ya construidos de sus hijos
+def thompson_step(value, children):
+
+    # Si el nodo es un literal construye un AFN para la literal; ε es una transicion epsilon
+    if not children:
         # Retornar el nuevo AFN
-        return AFN.from_symbol(node.value)
+        return AFN.from_symbol(None if value == EPSILON else value)
+
+    # Para las repeticiones {m,n} el AFN interno se construye una vez y se copia
+    if isinstance(value, Repetition):
+        return thompson_repetition(value, children[0])
 
-    # Para el operador Kleene '*' construye un AFN interno de forma recursiva
-    if node.value == '*':
-        internal_nfa = thompson_from_tree(node.children[0])
+    # Para el operador Kleene '*' envuelve el AFN interno
+    if value == '*':
+        internal_nfa = children[0]
         # Asegurarse de que el estado final del AFN interno no este marcado como final
         internal_nfa.end_state.is_final = False
         # Crea los estados iniciales y finales de este AFN interno
@@ -146,10 +239,33 @@ def thompson_from_tree(node):
         # Retornar el nuevo AFN
         return AFN(start, end)
 
-    # Para el operador de alternancia '|' construye un AFN izquiero y derecho de forma recursivca
-    if node.value == '|':
-        left_nfa = thompson_from_tree(node.children[0])
-        right_nfa = thompson_from_tree(node.children[1])
+    # Para el operador '+' el AFN interno se puede repetir, pero se recorre al menos una vez
+    if value == '+':
+        internal_nfa = children[0]
+        internal_nfa.end_state.is_final = False
+        start = State()
+        end = State()
+        # Agregar las transiciones epsilon para el operador '+' (como '*' pero sin saltar el AFN interno)
+        start.add_transition(None, internal_nfa.start_state)
+        internal_nfa.end_state.add_transition(None, internal_nfa.start_state)
+        internal_nfa.end_state.add_transition(None, end)
+        return AFN(start, end)
+
+    # Para el operador '?' el AFN interno se puede saltar
+    if value == '?':
+        internal_nfa = children[0]
+        internal_nfa.end_state.is_final = False
+        start = State()
+        end = State()
+        # Agregar las transiciones epsilon para el operador '?' (como '*' pero sin repetir el AFN interno)
+        start.add_transition(None, internal_nfa.start_state)
+        start.add_transition(None, end)
+        internal_nfa.end_state.add_transition(None, end)
+        return AFN(start, end)
+
+    # Para el operador de alternancia '|' une los AFN izquierdo y derecho
+    if value == '|':
+        left_nfa, right_nfa = children
         # Asegurarse de que los estados finales de ambos AFN no esten marcados como finales
         left_nfa.end_state.is_final = False
         right_nfa.end_state.is_final = False
@@ -164,10 +280,9 @@ def thompson_from_tree(node):
         # Retornar el nuevo AFN
         return AFN(start, end)
 
-    # Para el operador de concatenacion '^' construye un AFN izquierdo y derecho de forma recursiva
-    if node.value == '^':
-        left_nfa = thompson_from_tree(node.children[0])
-        right_nfa = thompson_from_tree(node.children[1])
+    # Para el operador de concatenacion '^' encadena los AFN izquierdo y derecho
+    if value == '^':
+        left_nfa, right_nfa = children
         # Asegurarse de que el estado final del AFN de la izquierda no este marcado como final
         left_nfa.end_state.is_final = False
         # Conectar el final de la izquierda al inicio de la derecha con transicion epsilon
@@ -176,6 +291,36 @@ def thompson_from_tree(node):
         return AFN(left_nfa.start_state, right_nfa.end_state)
 
 
+# Construir el AFN de X{m,n} a partir del AFN de X: m copias obligatorias seguidas de n-m copias
+# opcionales anidadas, X(X(X)?)?, para que cada copia opcional solo se intente si la anterior se uso.
+# X{m,} se construye como m-1 copias seguidas de X+ (o X* si m es 0).
+def thompson_repetition(repetition, nfa):
+
+    count = repetition.copies()
+    if count == 0:
+        return AFN.from_symbol(None)
+
+    copies = [nfa] + [nfa.copy() for _ in range(count - 1)]
+    minimum = repetition.minimum
+
+    if repetition.maximum is None:
+        if minimum == 0:
+            return thompson_step('*', copies)
+        copies[-1] = thompson_step('+', [copies[-1]])
+        tail = None
+    else:
+        # Copias opcionales anidadas, de la ultima a la primera
+        tail = None
+        for copy in reversed(copies[minimum:]):
+            tail = thompson_step('?', [copy if tail is None else thompson_step('^', [copy, tail])])
+        copies = copies[:minimum]
+
+    result = tail
+    for copy in reversed(copies):
+        result = copy if result is None else thompson_step('^', [copy, result])
+    return result
+
+
 # Simular el recorrido del AFN para una cadena de entrada dada.
 def simulate_afn(afn, input_string):
 
@@ -193,6 +338,10 @@ def simulate_afn(afn, input_string):
             if symbol in state.transitions:
                 for next_state in state.transitions[symbol]:
                     next_states.add(next_state)
+            # Transiciones etiquetadas con clases de caracteres
+            for label, targets in state.transitions.items():
+                if isinstance(label, CharClass) and symbol in label:
+                    next_states.update(targets)
         # Ampliar los estados siguientes para incluir cualquier estado alcanzable mediante transiciones epsilon
         next_states = epsilon_closure(next_states)
         current_states = next_states
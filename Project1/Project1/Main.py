@@ -1,67 +1,254 @@
 import io
+import sys
+import json
+import time
+import argparse
 from shuntingYard import ShuntingYard
 from syntaxTree import SyntaxTree
-from AFNsimulator import thompson_from_tree, State, simulate_afn
+from AFNsimulator import State, simulate_afn
 from AFDsimulator import convert_to_afd, simulate_afd, minimize_afd
+from AFDcompiler import CONSTRUCTIONS, build_afn
+from directAFD import direct_afd
+from stateLimit import DEFAULT_MAX_STATES, BudgetError, check_state_limit, estimate_states
+from compileBudget import CompileBudget, FALLBACKS, compile_with_budget, accepts_utf8
+from patternCache import PatternCache, DEFAULT_CACHE_DIR
+from batchMatcher import match_file, match_file_parallel, read_lines, DEFAULT_BLOCK_SIZE
+from multiPattern import compile_patterns
+from graphRenderer import GraphRenderer, FORMATS, DEFAULT_MAX_NODES
 
 converter = ShuntingYard()
 tree_maker = SyntaxTree()
 
 
+# Modo por lotes: evalua todas las lineas de un archivo contra cada expresion, sin graficos ni entradas
+# Con mas de un trabajador, la entrada se reparte en bloques entre un grupo de procesos
+# Los AFD compilados se toman del cache en disco cuando las expresiones no cambiaron
+# Con mapped=True los automatas del cache se cargan con mmap y los trabajadores comparten el archivo.
+# Con utf8=True se usan automatas sobre bytes y las lineas se evaluan sin decodificarlas.
+# construction indica como se construyen los AFD de las expresiones que no estan en el cache.
+# La compilacion de cada AFD esta limitada a max_states estados, max_seconds segundos y max_memory bytes;
+# si se excede, la expresion se evalua con el motor fallback ('lazy' o 'bitset') en un solo proceso
+# (workers no se usa), o se reporta y se omite con fallback=None.
+# Con stats_path se escribe en ese archivo una linea JSON por expresion con las estadisticas de compilacion.
+def run_batch(lines, path, workers=1, chunk_size=DEFAULT_BLOCK_SIZE, cache_dir=DEFAULT_CACHE_DIR, mapped=False, utf8=False,
+              construction='thompson', max_states=DEFAULT_MAX_STATES, stats_path=None, max_seconds=None, max_memory=None,
+              fallback='lazy'):
 
-with io.open('regex.txt', 'r', encoding='utf-8') as file:
-    lines = [line.strip().replace(" ", "") for line in file]
+    output = sys.stdout
+    stats_file = io.open(stats_path, 'w', encoding='utf-8') if stats_path else None
+    cache = PatternCache(cache_dir, mapped=mapped, utf8=utf8, construction=construction, max_states=max_states)
+    for index, infix in enumerate(lines):
+        budget = CompileBudget(max_states, max_seconds, max_memory)
+        try:
+            matcher, engine = compile_with_budget(infix, budget, fallback, lambda infix, stats: cache.get(infix, stats))
+        except BudgetError as error:
+            print(f"Expresion {index+1} '{infix}': {error}", file=sys.stderr)
+            continue
+        finally:
+            if stats_file:
+                stats_file.write(json.dumps({'expression': index+1, 'regex': infix, **budget.to_dict()}) + "\n")
+                stats_file.flush()
 
-for index, infix in enumerate(lines):
-    # Conversion de infix a postfix
-    print(f"Original: {infix}")
-    postfix = converter.infixToPostfix(infix)
-    print(f"Postfix: {postfix}\n")
+        if engine != 'dfa':
+            # El motor alternativo trabaja sobre texto y no se comparte entre procesos
+            print(f"Expresion {index+1} '{infix}': {budget.fallback_reason}; se usa el motor {engine}", file=sys.stderr)
+            if workers > 1:
+                print(f"Expresion {index+1} '{infix}': el motor {engine} se evalua en un solo proceso (se ignora --workers)", file=sys.stderr)
+            if utf8:
+                results = ((w, accepts_utf8(matcher, w)) for w in read_lines(path, binary=True))
+            else:
+                results = ((w, matcher.accepts(w)) for w in read_lines(path))
+        elif workers > 1:
+            results = match_file_parallel(matcher, path, workers, chunk_size)
+        else:
+            results = match_file(matcher, path, chunk_size)
 
-    # Construccion y visualizacion del arbol sintactico
-    root = tree_maker.build_tree(postfix)
-    tree_dot = tree_maker.visualize_tree(root)
-    tree_dot.render(f'arbol_sintactico_{index+1}', view = True, cleanup=True)
+        count = 0
+        start = time.perf_counter()
+        output.flush()
+        for w, accepted in results:
+            if utf8:
+                output.buffer.write(b"%d\t%d\t%s\n" % (index+1, accepted, w))
+            else:
+                output.write(f"{index+1}\t{int(accepted)}\t{w}\n")
+            count += 1
+        output.flush()
+        elapsed = time.perf_counter() - start
 
-    # Construccion y visualizacion del AFN
-    State.state_counter = 0
-    afn = thompson_from_tree(root)
-    afn.assign_state_numbers()
-    afn_dot = afn.visualize_afn()
-    afn_dot.render(f'afn_{index+1}', view = True, cleanup=True)
-    
-    # Construccion y visualizacion del AFD
-    afd = convert_to_afd(afn)
-    afd_dot = afd.visualize_afd()
-    afd_dot.render(f'afd_{index+1}', view = True, cleanup = True)
+        rate = count / elapsed if elapsed > 0 else float('inf')
+        print(f"Expresion {index+1} '{infix}': {count} cadenas en {elapsed:.3f}s ({rate:.0f} cadenas/s)", file=sys.stderr)
 
-    # Minimizacion
-    afd_min = minimize_afd(afd)
-    min_dot = afd_min.visualize_afd()
-    min_dot.render(f'min_afd_{index+1}', view=True, cleanup=True)
+    if stats_file:
+        stats_file.close()
 
 
-    # Evaluacion de la cadena 
-    w = input(f"Ingrese una cadena para probrar el AFN:")
+# Modo por lotes con todas las expresiones compiladas en un solo automata: cada linea del archivo
+# se recorre una sola vez y se reportan los numeros de todas las expresiones que la aceptan
+def run_batch_multi(lines, path, max_states=DEFAULT_MAX_STATES):
 
-    is_accepted_afn = simulate_afn(afn, w)
-    is_accepted_afd = simulate_afd(afd, w)
-    is_accepted_min = simulate_afd(afd_min, w)
+    output = sys.stdout
+    try:
+        compiled = compile_patterns(lines, max_states)
+    except BudgetError as error:
+        print(f"{len(lines)} expresiones: {error}", file=sys.stderr)
+        return
 
-    # Mensajes de aceptacion 
-    if is_accepted_afn:
-        print(f"La cadena '{w}' es aceptada por el AFN\n")
-    else:
-        print(f"La cadena '{w}' no es aceptada por el AFN\n")
+    count = 0
+    start = time.perf_counter()
+    for w in read_lines(path):
+        matched = ','.join(str(pattern_id + 1) for pattern_id in compiled.matches(w))
+        output.write(f"{matched}\t{w}\n")
+        count += 1
+    elapsed = time.perf_counter() - start
 
-    if is_accepted_afd:
-        print(f"La cadena '{w}' es aceptada por el AFD\n")
-    else:
-        print(f"La cadena '{w}' no es aceptada por el AFD\n")
+    rate = count / elapsed if elapsed > 0 else float('inf')
+    print(f"{len(lines)} expresiones: {count} cadenas en {elapsed:.3f}s ({rate:.0f} cadenas/s)", file=sys.stderr)
+
+
+# Modo interactivo: construye, visualiza y evalua cada expresion con una cadena ingresada por el usuario.
+# Con construction='direct' el AFD se construye desde el arbol y no se genera el AFN.
+# Las expresiones que superan max_states estados se reportan y se omiten.
+# Los graficos se dibujan en segundo plano con renderer (GraphRenderer); con renderer=None no se dibujan.
+def run_interactive(lines, construction='thompson', max_states=DEFAULT_MAX_STATES, renderer=None):
+
+    for index, infix in enumerate(lines):
+        # Conversion de infix a postfix
+        print(f"Original: {infix}")
+        postfix = converter.infixToPostfix(infix)
+        print(f"Postfix: {''.join(map(str, postfix))}\n")
+
+        # Construccion y visualizacion del arbol sintactico
+        root = tree_maker.build_tree(postfix)
+        if renderer:
+            renderer.render_tree(f'arbol_sintactico_{index+1}', tree_maker, root)
+
+        afn = None
+        try:
+            check_state_limit(estimate_states(root), max_states)
+            if construction == 'direct':
+                # Construccion directa del AFD desde el arbol (followpos)
+                afd = direct_afd(root, max_states)
+            else:
+                # Construccion y visualizacion del AFN (Thompson, Thompson reducido o de posiciones)
+                State.state_counter = 0
+                afn = build_afn(root, construction)
+                afn.assign_state_numbers()
+                if renderer:
+                    renderer.render_afn(f'afn_{index+1}', afn)
+
+                # Construccion del AFD
+                afd = convert_to_afd(afn, max_states)
+        except BudgetError as error:
+            print(f"{error}\n")
+            continue
+
+        # Visualizacion del AFD
+        if renderer:
+            renderer.render_afd(f'afd_{index+1}', afd)
+
+        # Minimizacion
+        afd_min = minimize_afd(afd)
+        if renderer:
+            renderer.render_afd(f'min_afd_{index+1}', afd_min)
+
+
+        # Evaluacion de la cadena 
+        w = input(f"Ingrese una cadena para probrar el AFN:")
+
+        is_accepted_afd = simulate_afd(afd, w)
+        is_accepted_min = simulate_afd(afd_min, w)
 
-    if is_accepted_min:
-        print(f"La cadena '{w}' es aceptada por el AFD minimizado\n")
+        # Mensajes de aceptacion 
+        if afn is not None:
+            if simulate_afn(afn, w):
+                print(f"La cadena '{w}' es aceptada por el AFN\n")
+            else:
+                print(f"La cadena '{w}' no es aceptada por el AFN\n")
+
+        if is_accepted_afd:
+            print(f"La cadena '{w}' es aceptada por el AFD\n")
+        else:
+            print(f"La cadena '{w}' no es aceptada por el AFD\n")
+
+        if is_accepted_min:
+            print(f"La cadena '{w}' es aceptada por el AFD minimizado\n")
+        else:
+            print(f"La cadena '{w}' no es aceptada por el AFD minimizado\n")
+
+        pause = input("Presione enter para continuar")
+
+
+# Valida que un argumento sea un entero mayor que cero
+def positive_int(text):
+
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser 1 o mayor: {text}")
+    return value
+
+
+# Punto de entrada: lee los argumentos y ejecuta el modo por lotes o el interactivo
+def main():
+
+    parser = argparse.ArgumentParser(description="Construccion y simulacion de AFN/AFD a partir de expresiones regulares")
+    parser.add_argument('--batch', metavar='ARCHIVO',
+                        help="evalua cada linea del archivo contra las expresiones de regex.txt y reporta cadenas por segundo")
+    parser.add_argument('--workers', type=positive_int, default=1, metavar='N',
+                        help="numero de procesos para el modo por lotes (por defecto 1); no se usa con las expresiones que pasan al motor de --fallback")
+    parser.add_argument('--chunk-size', type=positive_int, default=DEFAULT_BLOCK_SIZE, metavar='N',
+                        help=f"cadenas por bloque en el modo por lotes (por defecto {DEFAULT_BLOCK_SIZE})")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help=f"directorio del cache de automatas compilados (por defecto {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="no leer ni escribir el cache de automatas en disco")
+    parser.add_argument('--mmap', action='store_true',
+                        help="cargar los automatas del cache en disco con mmap, sin copiarlos")
+    parser.add_argument('--multi', action='store_true',
+                        help="en el modo por lotes, compilar todas las expresiones en un solo automata")
+    parser.add_argument('--utf8', action='store_true',
+                        help="en el modo por lotes, evaluar las lineas como bytes con automatas sobre UTF-8")
+    parser.add_argument('--construction', choices=CONSTRUCTIONS, default='thompson',
+                        help="metodo para construir los AFD: subconjuntos sobre el AFN de Thompson, el AFN de Thompson sin epsilon o el AFN de posiciones, o directo con followpos (por defecto thompson)")
+    parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES, metavar='N',
+                        help=f"limite de estados del AFN o AFD de cada expresion (por defecto {DEFAULT_MAX_STATES})")
+    parser.add_argument('--max-seconds', type=float, metavar='S',
+                        help="en el modo por lotes, tiempo maximo de compilacion del AFD de cada expresion (por defecto sin limite)")
+    parser.add_argument('--max-memory', type=float, metavar='MB',
+                        help="en el modo por lotes, memoria adicional maxima para compilar el AFD de cada expresion (por defecto sin limite)")
+    parser.add_argument('--fallback', choices=FALLBACKS + ('none',), default='lazy',
+                        help="motor para las expresiones que exceden los limites: AFD perezoso, AFN con mapas de bits, o ninguno (por defecto lazy)")
+    parser.add_argument('--render', choices=FORMATS + ('none',), default='pdf',
+                        help="en el modo interactivo, formato de los graficos; 'dot' solo escribe el archivo fuente (por defecto pdf)")
+    parser.add_argument('--no-view', action='store_true',
+                        help="en el modo interactivo, escribir los graficos sin abrir el visor")
+    parser.add_argument('--render-dir', default='.', metavar='DIR',
+                        help="directorio de los graficos (por defecto el actual)")
+    parser.add_argument('--max-render-nodes', type=int, default=DEFAULT_MAX_NODES, metavar='N',
+                        help=f"los graficos con mas nodos se reemplazan por un resumen; 0 es sin limite (por defecto {DEFAULT_MAX_NODES})")
+    parser.add_argument('--stats', metavar='ARCHIVO',
+                        help="en el modo por lotes, escribir las estadisticas de compilacion de cada expresion (JSON por linea)")
+    args = parser.parse_args()
+
+    with io.open('regex.txt', 'r', encoding='utf-8') as file:
+        lines = [line.strip().replace(" ", "") for line in file]
+
+    if args.batch and args.multi:
+        run_batch_multi(lines, args.batch, args.max_states)
+    elif args.batch:
+        run_batch(lines, args.batch, args.workers, args.chunk_size, None if args.no_cache else args.cache_dir, args.mmap, args.utf8, args.construction, args.max_states, args.stats,
+                  args.max_seconds, None if args.max_memory is None else int(args.max_memory * 2**20),
+                  None if args.fallback == 'none' else args.fallback)
     else:
-        print(f"La cadena '{w}' no es aceptada por el AFD minimizado\n")
+        renderer = None
+        if args.render != 'none':
+            renderer = GraphRenderer(args.render_dir, args.render, not args.no_view, args.max_render_nodes or None)
+        try:
+            run_interactive(lines, args.construction, args.max_states, renderer)
+        finally:
+            if renderer:
+                renderer.close()
+
+
+if __name__ == '__main__':
 
-    pause = input("Presione enter para continuar")
\ No newline at end of file
+    main()
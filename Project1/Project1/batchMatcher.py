@@ -0,0 +1,128 @@
+import io
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from os.path import commonprefix
+
+# Tamaño por defecto de los bloques en que se agrupan las cadenas de entrada
+DEFAULT_BLOCK_SIZE = 4096
+
+
+# Divide un iterable de cadenas en listas de a lo sumo block_size elementos
+def split_blocks(strings, block_size=DEFAULT_BLOCK_SIZE):
+
+    if block_size < 1:
+        raise ValueError(f"El tamaño de bloque debe ser 1 o mayor: {block_size}")
+    iterator = iter(strings)
+    while True:
+        block = list(islice(iterator, block_size))
+        if not block:
+            return
+        yield block
+
+
+# Evalua un bloque de cadenas con un AFD compilado y retorna la lista de resultados en el mismo orden.
+# Las cadenas se recorren ordenadas, de modo que cada una reutiliza los estados ya calculados
+# para el prefijo que comparte con la anterior (las cadenas repetidas no recorren nada).
+def match_block(compiled, block):
+
+    table = compiled.fast_table
+    results = [False] * len(block)
+
+    previous = block[0][:0] if block else ''    # Cadena vacia del mismo tipo (str o bytes)
+    prefix_states = [compiled.start]    # prefix_states[i] es el estado tras leer i simbolos de la cadena anterior
+
+    for i in sorted(range(len(block)), key=block.__getitem__):
+        string = block[i]
+
+        # Reutilizar el estado alcanzado con el prefijo comun y recorrer solo el resto
+        shared = len(commonprefix((previous, string)))
+        del prefix_states[shared + 1:]
+        state = prefix_states[shared]
+        for column in compiled.to_columns(string[shared:]):
+            state = table[state + column]
+            prefix_states.append(state)
+
+        results[i] = compiled.is_accepting(state)
+        previous = string
+
+    return results
+
+
+# Evalua cada cadena del iterable contra un mismo AFD compilado.
+# Produce pares (cadena, aceptada) en el orden de entrada, bloque por bloque.
+def match_batch(compiled, strings, block_size=DEFAULT_BLOCK_SIZE):
+
+    for block in split_blocks(strings, block_size):
+        yield from zip(block, match_block(compiled, block))
+
+
+# Lee las cadenas de un archivo con una cadena por linea, sin el salto de linea final.
+# Con binary=True las lineas se leen como bytes, sin decodificarlas.
+def read_lines(path, binary=False):
+
+    if binary:
+        with io.open(path, 'rb') as file:
+            for line in file:
+                yield line.rstrip(b'\r\n')
+        return
+
+    with io.open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            yield line.rstrip('\r\n')
+
+
+# Evalua cada linea de un archivo contra un mismo AFD compilado.
+# Si el AFD es de bytes UTF-8, las lineas se leen como bytes.
+def match_file(compiled, path, block_size=DEFAULT_BLOCK_SIZE):
+
+    yield from match_batch(compiled, read_lines(path, compiled.byte_mode), block_size)
+
+
+# AFD compilado de cada proceso trabajador, recibido una sola vez al iniciar el proceso
+worker_compiled = None
+
+
+# Inicializa un proceso trabajador con la tabla compacta del AFD compilado
+def init_worker(compiled):
+
+    global worker_compiled
+    worker_compiled = compiled
+
+
+# Evalua un bloque en un proceso trabajador; los resultados vuelven como bytes (1 aceptada, 0 rechazada)
+def match_worker_block(block):
+
+    return bytes(match_block(worker_compiled, block))
+
+
+# Evalua cada cadena del iterable contra un mismo AFD compilado usando un grupo de procesos.
+# La entrada se divide en bloques de chunk_size cadenas que se reparten entre los trabajadores;
+# los resultados se producen en el orden de entrada y se mantienen a lo sumo
+# max_pending bloques en vuelo para no cargar toda la entrada en memoria.
+def match_batch_parallel(compiled, strings, workers=None, chunk_size=DEFAULT_BLOCK_SIZE, max_pending=None):
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+
+    with Pool(workers, initializer=init_worker, initargs=(compiled,)) as pool:
+        pending = deque()
+
+        for block in split_blocks(strings, chunk_size):
+            pending.append((block, pool.apply_async(match_worker_block, (block,))))
+
+            # Esperar el bloque mas antiguo cuando hay demasiados en vuelo
+            if len(pending) >= max_pending:
+                done_block, result = pending.popleft()
+                yield from zip(done_block, map(bool, result.get()))
+
+        while pending:
+            done_block, result = pending.popleft()
+            yield from zip(done_block, map(bool, result.get()))
+
+
+# Evalua cada linea de un archivo contra un mismo AFD compilado usando un grupo de procesos
+def match_file_parallel(compiled, path, workers=None, chunk_size=DEFAULT_BLOCK_SIZE):
+
+    yield from match_batch_parallel(compiled, read_lines(path, compiled.byte_mode), workers, chunk_size)
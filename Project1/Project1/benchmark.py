@@ -0,0 +1,310 @@
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import thompson_from_tree, simulate_afn
+from AFDsimulator import convert_to_afd, simulate_afd, minimize_afd
+from AFDcompiler import compile_afd, compile_regex, simulate_compiled_afd
+from directAFD import direct_afd
+from reduceAFN import reduce_afn, glushkov_afn
+from compileStats import CompileStats
+
+# Simbolos usados por las familias de expresiones y por las cadenas de entrada
+ALPHABET = 'abcd'
+
+# Tamaños por defecto de cada familia
+DEFAULT_SIZES = {
+    'concatenation': [100, 1000, 5000],
+    'alternation': [10, 100, 500],
+    'nested_stars': [5, 20, 50],
+    'blowup': [4, 8, 12],
+    'long_regex': [1000, 10000, 100000],
+}
+
+# Familias que solo miden el analisis de la expresion (tokenize, postfix y arbol), para ver que
+# escala linealmente con la longitud sin que la construccion de los automatas domine el tiempo
+PARSE_ONLY_FAMILIES = {'long_regex'}
+
+
+# Concatenacion larga: abcdabcd... con n simbolos
+def concatenation_regex(n):
+
+    return ''.join(ALPHABET[i % len(ALPHABET)] for i in range(n))
+
+
+# Alternancia amplia de n palabras distintas: cada palabra es su numero escrito en base 4 con el alfabeto
+def alternation_regex(n):
+
+    words = []
+    for i in range(n):
+        word = ''
+        value = i
+        while True:
+            word += ALPHABET[value % len(ALPHABET)]
+            value //= len(ALPHABET)
+            if not value:
+                break
+        words.append(word + 'd')
+    return '|'.join(words)
+
+
+# Estrellas anidadas de profundidad n: ((((a)*b)*c)*d)*...
+def nested_stars_regex(n):
+
+    regex = ALPHABET[0]
+    for i in range(n):
+        regex = f"({regex})*{ALPHABET[(i + 1) % len(ALPHABET)]}"
+    return regex
+
+
+# Caso clasico de explosion de estados del AFD: (a|b)*a(a|b){n} necesita 2^(n+1) estados
+def blowup_regex(n):
+
+    return f"(a|b)*a(a|b){{{n}}}"
+
+
+# Expresion larga de unos n caracteres que mezcla grupos, clases, operadores unarios y repeticiones
+def long_regex_regex(n):
+
+    pieces = ['(ab|c)*', '[a-d]+', 'd?', '(a|b){2}', 'c', '((a|d)b)?']
+    regex = []
+    length = 0
+    while length < n:
+        piece = pieces[len(regex) % len(pieces)]
+        regex.append(piece)
+        length += len(piece)
+    return ''.join(regex)
+
+
+FAMILIES = {
+    'concatenation': concatenation_regex,
+    'alternation': alternation_regex,
+    'nested_stars': nested_stars_regex,
+    'blowup': blowup_regex,
+    'long_regex': long_regex_regex,
+}
+
+
+# Genera cadenas aleatorias sobre el alfabeto, siempre las mismas para una misma semilla
+def generate_inputs(count, length, seed=0):
+
+    generator = random.Random(seed)
+    return [''.join(generator.choice(ALPHABET) for _ in range(length)) for _ in range(count)]
+
+
+# Ejecuta function(argument) repeat veces y retorna (resultado, mejor tiempo en segundos)
+def best_time(function, argument, repeat):
+
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+# Ejecuta function(argument) una vez con tracemalloc y retorna el pico de memoria en bytes
+def peak_memory(function, argument):
+
+    tracemalloc.start()
+    try:
+        function(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Mide cada etapa de la compilacion y cada simulador para una expresion.
+# Con parse_only=True solo se miden tokenize, infixToPostfix y build_tree.
+# Retorna un diccionario listo para convertir a JSON.
+def benchmark_regex(regex, inputs, repeat=3, memory=True, parse_only=False):
+
+    converter = ShuntingYard()
+    tree_maker = SyntaxTree()
+
+    report = {'regex_length': len(regex), 'stages': {}, 'states': {}, 'matchers': {}}
+
+    # Tokenizador solo, y su tiempo por caracter para comparar longitudes
+    _, seconds = best_time(converter.tokenize, regex, repeat)
+    report['stages']['tokenize'] = {'seconds': seconds, 'microseconds_per_char': 1e6 * seconds / max(len(regex), 1)}
+    if memory:
+        report['stages']['tokenize']['peak_bytes'] = peak_memory(converter.tokenize, regex)
+
+    # Etapas en orden: cada una recibe el resultado de la anterior
+    stages = [
+        ('infixToPostfix', converter.infixToPostfix),
+        ('build_tree', tree_maker.build_tree),
+        ('thompson_from_tree', thompson_from_tree),
+        ('convert_to_afd', convert_to_afd),
+        ('minimize_afd', minimize_afd),
+        ('compile_afd', compile_afd),
+    ]
+
+    if parse_only:
+        stages = stages[:2]
+
+    results = {}
+    value = regex
+    for name, function in stages:
+        result, seconds = best_time(function, value, repeat)
+        report['stages'][name] = {'seconds': seconds}
+        if memory:
+            report['stages'][name]['peak_bytes'] = peak_memory(function, value)
+        results[name] = value = result
+
+    if parse_only:
+        return report
+
+    afn = results['thompson_from_tree']
+    afd = results['convert_to_afd']
+    afd_min = results['minimize_afd']
+    compiled = results['compile_afd']
+
+    # AFN reducido (sin epsilon) y automata de posiciones, y la construccion de subconjuntos sobre ellos
+    alternatives = [
+        ('reduce_afn', reduce_afn, afn),
+        ('glushkov_afn', glushkov_afn, results['build_tree']),
+    ]
+    for name, function, argument in alternatives:
+        result, seconds = best_time(function, argument, repeat)
+        report['stages'][name] = {'seconds': seconds}
+        _, convert_seconds = best_time(convert_to_afd, result, repeat)
+        report['stages'][f'convert_to_afd({name})'] = {'seconds': convert_seconds}
+        if memory:
+            report['stages'][name]['peak_bytes'] = peak_memory(function, argument)
+            report['stages'][f'convert_to_afd({name})']['peak_bytes'] = peak_memory(convert_to_afd, result)
+        results[name] = result
+    reduced_afn = results['reduce_afn']
+
+    # Construccion directa del AFD desde el arbol (followpos), para comparar con
+    # thompson_from_tree + convert_to_afd
+    direct, seconds = best_time(direct_afd, results['build_tree'], repeat)
+    report['stages']['direct_afd'] = {'seconds': seconds}
+    if memory:
+        report['stages']['direct_afd']['peak_bytes'] = peak_memory(direct_afd, results['build_tree'])
+
+    afn_states, afn_edges = afn.size()
+    reduced_states, reduced_edges = reduced_afn.size()
+    glushkov_states, glushkov_edges = results['glushkov_afn'].size()
+    report['states'] = {
+        'afn': afn_states,
+        'afn_edges': afn_edges,
+        'reduced_afn': reduced_states,
+        'reduced_afn_edges': reduced_edges,
+        'glushkov_afn': glushkov_states,
+        'glushkov_afn_edges': glushkov_edges,
+        'afd': len(afd.states),
+        'direct_afd': len(direct.states),
+        'min_afd': len(afd_min.states),
+    }
+
+    # Contadores de los ciclos internos (cierres epsilon, rondas de refinamiento, etc.)
+    stats = CompileStats()
+    compile_regex(regex, max_states=None, stats=stats)
+    report['counters'] = stats.counters
+
+    matchers = [
+        ('simulate_afn', lambda w: simulate_afn(afn, w)),
+        ('simulate_reduced_afn', lambda w: simulate_afn(reduced_afn, w)),
+        ('simulate_afd', lambda w: simulate_afd(afd, w)),
+        ('simulate_afd_min', lambda w: simulate_afd(afd_min, w)),
+        ('simulate_compiled_afd', lambda w: simulate_compiled_afd(compiled, w)),
+    ]
+    for name, matcher in matchers:
+        _, seconds = best_time(lambda strings: [matcher(w) for w in strings], inputs, repeat)
+        rate = len(inputs) / seconds if seconds > 0 else None
+        report['matchers'][name] = {'seconds': seconds, 'strings_per_second': rate}
+
+    return report
+
+
+# Retorna el commit actual del repositorio, o None si no se puede obtener
+def git_revision():
+
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Ejecuta todas las familias y tamaños y retorna el reporte completo
+def run_benchmarks(families, sizes=None, inputs=200, length=50, repeat=3, memory=True, seed=0):
+
+    strings = generate_inputs(inputs, length, seed)
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'inputs': inputs,
+        'input_length': length,
+        'repeat': repeat,
+        'results': [],
+    }
+    for family in families:
+        for size in sizes or DEFAULT_SIZES[family]:
+            regex = FAMILIES[family](size)
+            print(f"{family} n={size}", file=sys.stderr)
+            result = {'family': family, 'size': size}
+            result.update(benchmark_regex(regex, strings, repeat, memory, family in PARSE_ONLY_FAMILIES))
+            report['results'].append(result)
+    return report
+
+
+# Compara un reporte con uno anterior y escribe la razon de tiempos (nuevo / anterior) por etapa
+def compare_reports(report, baseline, file=sys.stderr):
+
+    previous = {(r['family'], r['size']): r for r in baseline['results']}
+    for result in report['results']:
+        old = previous.get((result['family'], result['size']))
+        if old is None:
+            continue
+        ratios = []
+        for group in ('stages', 'matchers'):
+            for name, values in result[group].items():
+                old_values = old[group].get(name)
+                if old_values and old_values['seconds'] > 0:
+                    ratios.append(f"{name} x{values['seconds'] / old_values['seconds']:.2f}")
+        print(f"{result['family']} n={result['size']}: {', '.join(ratios)}", file=file)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Mide cada etapa de la compilacion y cada simulador con familias de expresiones generadas")
+    parser.add_argument('--families', nargs='+', choices=list(FAMILIES), default=list(FAMILIES),
+                        help="familias de expresiones a medir (por defecto todas)")
+    parser.add_argument('--sizes', nargs='+', type=int, metavar='N',
+                        help="tamaños a medir en cada familia (por defecto los de DEFAULT_SIZES)")
+    parser.add_argument('--inputs', type=int, default=200, metavar='N',
+                        help="cantidad de cadenas de entrada para los simuladores (por defecto 200)")
+    parser.add_argument('--length', type=int, default=50, metavar='N',
+                        help="longitud de las cadenas de entrada (por defecto 50)")
+    parser.add_argument('--repeat', type=int, default=3, metavar='N',
+                        help="repeticiones de cada medicion; se reporta el mejor tiempo (por defecto 3)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="no medir el pico de memoria de cada etapa")
+    parser.add_argument('--output', metavar='ARCHIVO',
+                        help="archivo JSON de salida (por defecto la salida estandar)")
+    parser.add_argument('--compare', metavar='ARCHIVO',
+                        help="reporte JSON anterior para comparar los tiempos")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.families, args.sizes, args.inputs, args.length, args.repeat, not args.no_memory)
+
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with io.open(args.compare, 'r', encoding='utf-8') as file:
+            compare_reports(report, json.load(file))
@@ -0,0 +1,102 @@
+from AFNsimulator import epsilon_closure
+from charClass import AlphabetPartition
+
+# Clase que representa un AFN con sus estados numerados densamente (0..n-1), donde cada conjunto
+# de estados es un entero usado como mapa de bits. Los cierres epsilon y los sucesores por simbolo
+# se calculan una sola vez, asi cada paso de la simulacion son unas pocas operaciones OR.
+# Los sucesores se indexan por clase del alfabeto (ver AlphabetPartition), no por etiqueta.
+class BitsetAFN:
+
+    def __init__(self, afn):
+
+        # Numerar los estados alcanzables desde el estado inicial
+        states = [afn.start_state]
+        index = {afn.start_state: 0}
+        i = 0
+        while i < len(states):
+            for next_states in states[i].transitions.values():
+                for next_state in next_states:
+                    if next_state not in index:
+                        index[next_state] = len(states)
+                        states.append(next_state)
+            i += 1
+
+        self.num_states = len(states)
+
+        # Cierre epsilon de cada estado como mapa de bits
+        self.closures = [self.to_mask(epsilon_closure({state}), index) for state in states]
+
+        # Estados de aceptacion
+        self.final_mask = self.to_mask((state for state in states if state.is_final), index)
+
+        # Para cada clase del alfabeto: mapa de bits de los estados con transicion sobre ella y,
+        # por estado, el cierre epsilon de sus destinos
+        self.alphabet = AlphabetPartition(symbol for state in states for symbol in state.transitions)
+        self.sources = {}
+        self.successors = {}
+        for i, state in enumerate(states):
+            for label, next_states in state.transitions.items():
+                if label is None:
+                    continue
+                mask = 0
+                for next_state in next_states:
+                    mask |= self.closures[index[next_state]]
+                for symbol in self.alphabet.keys_for(label):
+                    self.sources[symbol] = self.sources.get(symbol, 0) | (1 << i)
+                    successors = self.successors.setdefault(symbol, {})
+                    successors[i] = successors.get(i, 0) | mask
+
+        self.symbols = set(self.sources)
+        self.start_mask = self.closures[0]
+
+
+    # Convierte un conjunto de estados a su mapa de bits
+    @staticmethod
+    def to_mask(states, index):
+
+        mask = 0
+        for state in states:
+            mask |= 1 << index[state]
+        return mask
+
+
+    # Calcula el conjunto de estados (ya cerrado bajo epsilon) alcanzable desde current con un simbolo
+    def step(self, current, symbol):
+
+        symbol = self.alphabet.classify(symbol)
+        active = current & self.sources.get(symbol, 0)
+        if not active:
+            return 0
+
+        successors = self.successors[symbol]
+        next_mask = 0
+        # Recorrer solo los bits activos que tienen transicion sobre el simbolo
+        while active:
+            low = active & -active
+            next_mask |= successors[low.bit_length() - 1]
+            active ^= low
+        return next_mask
+
+
+    # Indica si el conjunto de estados contiene algun estado de aceptacion
+    def is_accepting(self, current):
+
+        return bool(current & self.final_mask)
+
+
+    # Retorna True si el AFN acepta la cadena de entrada
+    def accepts(self, input_string):
+
+        current = self.start_mask
+        for symbol in input_string:
+            current = self.step(current, symbol)
+            if not current:
+                return False
+        return self.is_accepting(current)
+
+
+
+# Simula el AFN con mapas de bits para una cadena de entrada dada
+def simulate_bitset_afn(bitset_afn, input_string):
+
+    return bitset_afn.accepts(input_string)
@@ -0,0 +1,220 @@
+# Clase que representa una clase de caracteres: un conjunto de caracteres o, si negated es True,
+# todos los caracteres excepto los del conjunto. '.' es la clase negada vacia (cualquier caracter).
+class CharClass:
+
+    def __init__(self, chars, negated=False, text=None):
+
+        self.chars = frozenset(chars)       # Caracteres listados
+        self.negated = negated              # True si la clase es el complemento de chars
+        self.text = text if text is not None else class_text(self.chars, negated)
+
+
+    # Indica si el caracter pertenece a la clase
+    def __contains__(self, char):
+
+        return (char in self.chars) != self.negated
+
+
+    def __eq__(self, other):
+
+        if not isinstance(other, CharClass):
+            return NotImplemented
+        return self.chars == other.chars and self.negated == other.negated
+
+
+    def __hash__(self):
+
+        return hash((self.chars, self.negated))
+
+
+    def __str__(self):
+
+        return self.text
+
+
+    def __repr__(self):
+
+        return f"CharClass({self.text!r})"
+
+
+
+# Clase que representa cualquier caracter
+ANY = CharClass((), negated=True, text='.')
+
+# Simbolo que representa la cadena vacia en las expresiones (por ejemplo, 'a?' se reescribe como 'a|ε')
+EPSILON = 'ε'
+
+# Caracter que convierte al siguiente en literal, por ejemplo '\.' o '\('
+ESCAPE = '\\'
+
+# Simbolos que las etapas posteriores al tokenizador leen como operadores o como la cadena vacia
+OPERATOR_SYMBOLS = frozenset('()|*+?^' + EPSILON)
+
+
+# Genera el texto de una clase agrupando los caracteres consecutivos en rangos, por ejemplo [a-z0-9]
+def class_text(chars, negated=False):
+
+    if negated and not chars:
+        return '.'
+
+    parts = []
+    codes = sorted(ord(c) for c in chars)
+    i = 0
+    while i < len(codes):
+        j = i
+        while j + 1 < len(codes) and codes[j + 1] == codes[j] + 1:
+            j += 1
+        if j - i >= 2:
+            parts.append(f"{chr(codes[i])}-{chr(codes[j])}")
+        else:
+            parts.extend(chr(code) for code in codes[i:j + 1])
+        i = j + 1
+
+    return ('[^' if negated else '[') + ''.join(parts) + ']'
+
+
+# Lee el caracter de una clase que empieza en regex[i]; '\' lo convierte en literal (por ejemplo '\]').
+# Retorna el caracter y la posicion siguiente.
+def parse_class_char(regex, i):
+
+    if regex[i] == ESCAPE:
+        if i + 1 >= len(regex):
+            raise Exception("Invalid expression")
+        return regex[i + 1], i + 2
+    return regex[i], i + 1
+
+
+# Lee una clase entre corchetes que empieza en regex[start] == '['.
+# Soporta rangos (a-z), negacion ([^...]), ']' o '-' como literales al inicio o al final, y
+# caracteres escapados con '\' (por ejemplo [\]\-]).
+# Retorna la clase y la posicion siguiente al ']' de cierre.
+def parse_class(regex, start):
+
+    i = start + 1
+    negated = i < len(regex) and regex[i] == '^'
+    if negated:
+        i += 1
+
+    chars = set()
+    first = True
+    while i < len(regex) and (regex[i] != ']' or first):
+        char, i = parse_class_char(regex, i)
+        # Rango a-z (un '-' antes del ']' de cierre es literal)
+        if i + 1 < len(regex) and regex[i] == '-' and regex[i + 1] != ']':
+            end, i = parse_class_char(regex, i + 1)
+            if ord(end) < ord(char):
+                raise Exception("Invalid expression")
+            chars.update(chr(code) for code in range(ord(char), ord(end) + 1))
+        else:
+            chars.add(char)
+        first = False
+
+    if i >= len(regex):
+        raise Exception("Invalid expression")
+
+    return CharClass(chars, negated, regex[start:i + 1]), i + 1
+
+
+# Lee un caracter escapado que empieza en regex[start] == '\' y retorna el simbolo literal y la
+# posicion siguiente. Los simbolos que shunting yard y el arbol sintactico leen como operadores (o como ε)
+# se convierten en una clase de un solo caracter; los demas ('.', '[', '{', '\', letras...) quedan igual.
+def parse_escape(regex, start):
+
+    if start + 1 >= len(regex):
+        raise Exception("Invalid expression")
+    char = regex[start + 1]
+    if char in OPERATOR_SYMBOLS:
+        return CharClass((char,), text=ESCAPE + char), start + 2
+    return char, start + 2
+
+
+# Indica si una etiqueta de transicion (caracter o CharClass) acepta el caracter dado
+def label_matches(label, char):
+
+    if isinstance(label, CharClass):
+        return char in label
+    return label == char
+
+
+
+# Clase que divide el alfabeto en clases de equivalencia a partir de las etiquetas de un automata.
+# Dos caracteres son equivalentes si todas las etiquetas los aceptan a ambos o a ninguno, asi el AFD
+# puede tener una transicion por clase en lugar de una por caracter. Cada clase se identifica con
+# una clave: el caracter mismo si la clase tiene un solo caracter, o una CharClass en otro caso.
+# Los caracteres que no aparecen en ninguna etiqueta forman la clase "otros", que solo existe si
+# alguna etiqueta es negada (por ejemplo '.').
+class AlphabetPartition:
+
+    def __init__(self, labels):
+
+        labels = list(dict.fromkeys(label for label in labels if label is not None))
+        negated = frozenset(i for i, label in enumerate(labels)
+                            if isinstance(label, CharClass) and label.negated)
+
+        # Caracteres mencionados explicitamente en alguna etiqueta
+        explicit = set()
+        for label in labels:
+            if isinstance(label, CharClass):
+                explicit.update(label.chars)
+            else:
+                explicit.add(label)
+
+        # Agrupar los caracteres por el conjunto de etiquetas que los aceptan
+        groups = {}
+        for char in explicit:
+            signature = frozenset(i for i, label in enumerate(labels) if label_matches(label, char))
+            if signature:
+                groups.setdefault(signature, []).append(char)
+
+        self.char_keys = {}                     # Caracter explicito -> clave de su clase
+        label_keys = {i: [] for i in range(len(labels))}
+        for signature, chars in groups.items():
+            key = chars[0] if len(chars) == 1 else CharClass(chars)
+            for char in chars:
+                self.char_keys[char] = key
+            for i in signature:
+                label_keys[i].append(key)
+
+        # Los caracteres mencionados que ninguna etiqueta acepta (por ejemplo 'a' en [^a]) no tienen clase
+        for char in explicit:
+            self.char_keys.setdefault(char, None)
+
+        # Clase de los caracteres no mencionados
+        self.other_key = None
+        if negated:
+            self.other_key = CharClass(explicit, negated=True)
+            for i in negated:
+                label_keys[i].append(self.other_key)
+
+        self.label_keys = {labels[i]: keys for i, keys in label_keys.items()}   # Etiqueta -> claves que cubre
+        self.keys = list(dict.fromkeys(key for keys in self.label_keys.values() for key in keys))
+
+
+    # Construye la particion con las etiquetas de todos los estados alcanzables de un AFN
+    @staticmethod
+    def from_afn(afn):
+
+        labels = set()
+        visited = {afn.start_state}
+        states_to_visit = [afn.start_state]
+        while states_to_visit:
+            state = states_to_visit.pop()
+            for symbol, next_states in state.transitions.items():
+                labels.add(symbol)
+                for next_state in next_states:
+                    if next_state not in visited:
+                        visited.add(next_state)
+                        states_to_visit.append(next_state)
+        return AlphabetPartition(labels)
+
+
+    # Retorna las claves de las clases que cubre una etiqueta
+    def keys_for(self, label):
+
+        return self.label_keys.get(label, ())
+
+
+    # Retorna la clave de la clase del caracter, o None si ninguna etiqueta lo acepta
+    def classify(self, char):
+
+        return self.char_keys.get(char, self.other_key)
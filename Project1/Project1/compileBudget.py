@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+from compileStats import CompileStats
+from stateLimit import DEFAULT_MAX_STATES, BudgetError, TimeLimitError, MemoryLimitError, check_state_limit, estimate_states
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import thompson_from_tree
+from AFDcompiler import compile_regex
+from bitsetAFN import BitsetAFN
+from lazyAFD import LazyAFD
+
+# resource solo existe en sistemas Unix; sin el, la memoria se lee de /proc o no se limita
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Motores con los que se puede reconocer una expresion: el AFD compilado o, si no cabe en el
+# presupuesto, el AFN con mapas de bits o el AFD perezoso construido sobre el
+ENGINES = ('dfa', 'bitset', 'lazy')
+FALLBACKS = ('bitset', 'lazy')
+
+
+# Retorna la memoria residente del proceso en bytes, o None si no se puede medir
+def memory_in_use():
+
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss es el pico de memoria, no la memoria actual; esta en bytes en macOS y en KB en los demas
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+    return None
+
+
+
+# Clase que limita los recursos de la compilacion de una expresion: estados del AFD, segundos y
+# bytes de memoria adicionales desde start(). Es un CompileStats, asi que se pasa como stats al
+# pipeline; el tiempo y la memoria se revisan al terminar cada etapa y cada PROGRESS_INTERVAL
+# estados nuevos del AFD, y al excederse se lanza la subclase de BudgetError correspondiente.
+class CompileBudget(CompileStats):
+
+    def __init__(self, max_states=DEFAULT_MAX_STATES, max_seconds=None, max_memory=None,
+                 callback=None, track_memory=False):
+
+        super().__init__(callback, track_memory)
+        self.max_states = max_states        # Estados maximos del AFN estimado y del AFD (None es sin limite)
+        self.max_seconds = max_seconds      # Segundos maximos de compilacion (None es sin limite)
+        self.max_memory = max_memory        # Bytes de memoria adicionales maximos (None es sin limite)
+        self.engine = None                  # Motor elegido (ver ENGINES)
+        self.fallback_reason = None         # Mensaje del limite excedido si se uso un motor alternativo
+        self.start()
+
+
+    # Reinicia el reloj y la memoria de referencia
+    def start(self):
+
+        self.started = time.perf_counter()
+        self.base_memory = memory_in_use() if self.max_memory is not None else None
+
+
+    # Lanza TimeLimitError o MemoryLimitError si se excedio el presupuesto
+    def check(self):
+
+        if self.max_seconds is not None:
+            elapsed = time.perf_counter() - self.started
+            if elapsed > self.max_seconds:
+                raise TimeLimitError(elapsed, self.max_seconds)
+
+        if self.base_memory is not None:
+            used = memory_in_use() - self.base_memory
+            if used > self.max_memory:
+                raise MemoryLimitError(used, self.max_memory)
+
+
+    def emit(self, event):
+
+        super().emit(event)
+        self.check()
+
+
+    def to_dict(self):
+
+        result = super().to_dict()
+        result['engine'] = self.engine
+        if self.fallback_reason is not None:
+            result['fallback_reason'] = self.fallback_reason
+        return result
+
+
+
+# Construye el reconocedor alternativo para una expresion: 'bitset' (BitsetAFN) o 'lazy' (LazyAFD).
+# El AFN tambien debe caber en max_states; si no, se lanza StateLimitError.
+def build_fallback(infix, engine, max_states=DEFAULT_MAX_STATES):
+
+    root = SyntaxTree().build_tree(ShuntingYard().infixToPostfix(infix))
+    check_state_limit(estimate_states(root), max_states)
+    bitset_afn = BitsetAFN(thompson_from_tree(root))
+    if engine == 'bitset':
+        return bitset_afn
+    if engine == 'lazy':
+        return LazyAFD(bitset_afn)
+    raise ValueError(f"Motor desconocido: {engine}")
+
+
+# Compila una expresion dentro del presupuesto dado. Retorna (reconocedor, motor): el CompiledAFD y
+# 'dfa' si la compilacion termina dentro del presupuesto, o el reconocedor de fallback ('bitset' o
+# 'lazy') si se excede. Con fallback=None el BudgetError se propaga.
+# compile(infix, stats) permite cambiar como se compila el AFD (por ejemplo, con PatternCache.get);
+# por defecto se usa compile_regex con el limite de estados del presupuesto.
+def compile_with_budget(infix, budget=None, fallback='lazy', compile=None):
+
+    if budget is None:
+        budget = CompileBudget()
+    if compile is None:
+        compile = lambda infix, stats: compile_regex(infix, max_states=stats.max_states, stats=stats)
+
+    budget.start()
+    try:
+        matcher = compile(infix, budget)
+        budget.engine = 'dfa'
+    except BudgetError as error:
+        if fallback is None:
+            raise
+        matcher = build_fallback(infix, fallback, budget.max_states)
+        budget.engine = fallback
+        budget.fallback_reason = str(error)
+
+    return matcher, budget.engine
+
+
+# Evalua una linea en bytes con un reconocedor alternativo, que trabaja sobre texto. Las lineas que no
+# son UTF-8 valido se rechazan, igual que en los automatas sobre bytes (ver utf8Automaton).
+def accepts_utf8(matcher, line):
+
+    try:
+        return matcher.accepts(line.decode('utf-8'))
+    except UnicodeDecodeError:
+        return False
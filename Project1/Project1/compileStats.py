@@ -0,0 +1,106 @@
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Cada cuantos estados nuevos la construccion de un AFD reporta su avance
+PROGRESS_INTERVAL = 256
+
+
+# Clase que registra lo que ocurre al compilar una expresion: tiempo y memoria de cada etapa,
+# contadores de los ciclos internos (cierres epsilon, rondas de refinamiento, etc.) y tamaños de
+# los automatas. Se pasa como parametro opcional stats a las funciones del pipeline; con stats=None
+# no se registra nada.
+# callback(event, stats) se llama al terminar cada etapa con event = {'type': 'stage', 'stage', ...}
+# y durante las construcciones largas (cada PROGRESS_INTERVAL estados) con
+# event = {'type': 'progress', 'name', 'value'}, asi se puede avisar o detener (lanzando una
+# excepcion) una expresion que esta por explotar.
+# Con track_memory=True cada etapa tambien mide el pico de memoria con tracemalloc (mas lento).
+class CompileStats:
+
+    def __init__(self, callback=None, track_memory=False):
+
+        self.stages = {}        # Etapa -> {'seconds', 'allocated_blocks', 'peak_bytes'}
+        self.counters = {}      # Nombre -> valor acumulado
+        self.sizes = {}         # Nombre -> tamaño de un automata (estados, transiciones)
+        self.callback = callback
+        self.track_memory = track_memory
+
+
+    # Mide una etapa: with stats.stage('convert_to_afd'): ...
+    # allocated_blocks es la diferencia de bloques de memoria reservados por Python al terminar la etapa
+    @contextmanager
+    def stage(self, name):
+
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            record = {
+                'seconds': time.perf_counter() - start,
+                'allocated_blocks': sys.getallocatedblocks() - blocks,
+            }
+            if tracing:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.stages[name] = record
+            self.emit({'type': 'stage', 'stage': name, **record})
+
+
+    # Suma amount al contador name
+    def count(self, name, amount=1):
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+
+    # Registra el tamaño de un automata o estructura
+    def size(self, name, value):
+
+        self.sizes[name] = value
+
+
+    # Informa el avance de una construccion larga (por ejemplo, los estados del AFD creados hasta ahora)
+    def progress(self, name, value):
+
+        self.emit({'type': 'progress', 'name': name, 'value': value})
+
+
+    def emit(self, event):
+
+        if self.callback is not None:
+            self.callback(event, self)
+
+
+    # Retorna el tiempo total de todas las etapas medidas
+    def total_seconds(self):
+
+        return sum(record['seconds'] for record in self.stages.values())
+
+
+    def to_dict(self):
+
+        return {
+            'stages': self.stages,
+            'counters': self.counters,
+            'sizes': self.sizes,
+            'total_seconds': self.total_seconds(),
+        }
+
+
+    def to_json(self, **kwargs):
+
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+
+# Retorna un contexto que mide la etapa si hay stats, o que no hace nada si stats es None
+def stage(stats, name):
+
+    if stats is None:
+        return nullcontext()
+    return stats.stage(name)
@@ -0,0 +1,228 @@
+from charClass import AlphabetPartition, EPSILON
+from repetition import Repetition
+from stateLimit import check_state_limit
+from compileStats import PROGRESS_INTERVAL
+from AFDsimulator import AFD, AFDState
+
+
+# Clase que representa un estado del AFD construido directamente: un conjunto de posiciones
+# del arbol (hojas) guardado como mapa de bits
+class PositionState(AFDState):
+
+    def __init__(self, positions, is_final):
+
+        super().__init__(())
+        self.positions = positions      # Mapa de bits de las posiciones del estado
+        self.is_final = is_final
+
+
+
+# Calcula nullable, firstpos, lastpos y followpos de un arbol sintactico aumentado con un marcador
+# de fin '#'. Las posiciones son las hojas numeradas de izquierda a derecha; los conjuntos de
+# posiciones son enteros usados como mapas de bits. El recorrido es iterativo (postorden).
+# Retorna (firstpos de la raiz aumentada, etiquetas por posicion, followpos por posicion, posicion de '#').
+def followpos_from_tree(root):
+
+    labels = []         # Posicion -> simbolo de la hoja
+    followpos = []      # Posicion -> mapa de bits de las posiciones que pueden seguirla
+    results = []        # Pila de (nullable, firstpos, lastpos) de los subarboles ya procesados
+
+    # Pila de (nodo, primera posicion de su subarbol, o None si falta visitar sus hijos)
+    nodes_to_visit = [(root, None)]
+    while nodes_to_visit:
+        node, first_position = nodes_to_visit.pop()
+        if node.children and first_position is None:
+            nodes_to_visit.append((node, len(labels)))
+            for child in reversed(node.children):
+                nodes_to_visit.append((child, None))
+            continue
+
+        # Hoja: ε es la cadena vacia, cualquier otro simbolo es una nueva posicion
+        if not node.children:
+            if node.value == EPSILON:
+                results.append((True, 0, 0))
+            else:
+                bit = 1 << len(labels)
+                labels.append(node.value)
+                followpos.append(0)
+                results.append((False, bit, bit))
+
+        # Repeticion {m,n}: las posiciones del hijo se copian desplazando los mapas de bits
+        elif isinstance(node.value, Repetition):
+            child = results.pop()
+            results.append(repeat_positions(node.value, child, labels, followpos, first_position))
+
+        # Kleene '*': despues de la ultima posicion puede volver la primera
+        elif node.value == '*':
+            nullable, first, last = results.pop()
+            add_followpos(followpos, last, first)
+            results.append((True, first, last))
+
+        # '+': igual que '*', pero solo es nullable si el hijo lo es
+        elif node.value == '+':
+            nullable, first, last = results.pop()
+            add_followpos(followpos, last, first)
+            results.append((nullable, first, last))
+
+        # '?': igual que el hijo, pero nullable
+        elif node.value == '?':
+            nullable, first, last = results.pop()
+            results.append((True, first, last))
+
+        elif node.value == '|':
+            right = results.pop()
+            left = results.pop()
+            results.append((left[0] or right[0], left[1] | right[1], left[2] | right[2]))
+
+        # Concatenacion '^': despues de las ultimas de la izquierda vienen las primeras de la derecha
+        elif node.value == '^':
+            right = results.pop()
+            left = results.pop()
+            results.append(concat_positions(followpos, left, right))
+
+        else:
+            raise Exception("Invalid expression")
+
+    if len(results) != 1:
+        raise Exception("Invalid expression")
+
+    # Aumentar con el marcador de fin: (root)^#
+    nullable, first, last = results[0]
+    end_position = len(labels)
+    labels.append(None)
+    followpos.append(0)
+    add_followpos(followpos, last, 1 << end_position)
+    if nullable:
+        first |= 1 << end_position
+
+    return first, labels, followpos, end_position
+
+
+# Construye X{m,n} a partir de (nullable, firstpos, lastpos) de X, cuyas posiciones ocupan el rango
+# [start, len(labels)). Las copias de X son el mismo rango desplazado: se agregan sus etiquetas y su
+# followpos (que en ese momento solo apunta dentro del rango) desplazando los mapas de bits.
+# Las copias se combinan como en thompson_repetition: m obligatorias y n-m opcionales anidadas.
+def repeat_positions(repetition, child, labels, followpos, start):
+
+    count = repetition.copies()
+    if count == 0:
+        return (True, 0, 0)
+
+    end = len(labels)
+    copies = [child]
+    for _ in range(count - 1):
+        shift = len(labels) - start
+        labels.extend(labels[start:end])
+        followpos.extend(targets << shift for targets in followpos[start:end])
+        copies.append((child[0], child[1] << shift, child[2] << shift))
+
+    minimum = repetition.minimum
+    if repetition.maximum is None:
+        if minimum == 0:
+            nullable, first, last = copies[0]
+            add_followpos(followpos, last, first)
+            return (True, first, last)
+        nullable, first, last = copies[-1]
+        add_followpos(followpos, last, first)
+        tail = None
+    else:
+        tail = None
+        for copy in reversed(copies[minimum:]):
+            if tail is not None:
+                copy = concat_positions(followpos, copy, tail)
+            tail = (True, copy[1], copy[2])
+        copies = copies[:minimum]
+
+    result = tail
+    for copy in reversed(copies):
+        result = copy if result is None else concat_positions(followpos, copy, result)
+    return result
+
+
+# Calcula (nullable, firstpos, lastpos) de la concatenacion de left y right, actualizando followpos
+def concat_positions(followpos, left, right):
+
+    add_followpos(followpos, left[2], right[1])
+    first = left[1] | right[1] if left[0] else left[1]
+    last = left[2] | right[2] if right[0] else right[2]
+    return (left[0] and right[0], first, last)
+
+
+# Agrega targets al followpos de cada posicion del mapa de bits positions
+def add_followpos(followpos, positions, targets):
+
+    while positions:
+        low = positions & -positions
+        followpos[low.bit_length() - 1] |= targets
+        positions ^= low
+
+
+# Construye un AFD directamente desde el arbol sintactico, sin pasar por un AFN: cada estado es
+# un conjunto de posiciones y la transicion con una clase del alfabeto es la union de followpos
+# de las posiciones del estado cuyo simbolo acepta esa clase. Los estados que contienen '#' son finales.
+# Si el AFD supera max_states estados se lanza StateLimitError (None es sin limite).
+# Con stats (CompileStats) se cuentan las posiciones y las transiciones, y se informa el avance.
+def direct_afd(root, max_states=None, stats=None):
+
+    start, labels, followpos, end_position = followpos_from_tree(root)
+    end_bit = 1 << end_position
+
+    afd = AFD()
+    alphabet = AlphabetPartition(labels)
+    afd.alphabet = alphabet
+
+    # Para cada clase del alfabeto, mapa de bits de las posiciones cuyo simbolo la acepta
+    key_positions = {}
+    for position, label in enumerate(labels):
+        if label is None:
+            continue
+        for symbol in alphabet.keys_for(label):
+            key_positions[symbol] = key_positions.get(symbol, 0) | (1 << position)
+
+    initial_state = PositionState(start, bool(start & end_bit))
+    initial_state.state_number = 1
+    afd.start_state = initial_state
+    afd.add_state(initial_state)
+
+    states_index = {start: initial_state}   # Mapa de bits de posiciones -> estado del AFD
+    unprocessed_states = [initial_state]
+    counter = 2
+    transitions = 0
+
+    while unprocessed_states:
+        current_state = unprocessed_states.pop()
+
+        for symbol, positions in key_positions.items():
+            active = current_state.positions & positions
+            if not active:
+                continue
+
+            # Union de followpos de las posiciones activas
+            next_positions = 0
+            while active:
+                low = active & -active
+                next_positions |= followpos[low.bit_length() - 1]
+                active ^= low
+            if not next_positions:
+                continue
+
+            next_state = states_index.get(next_positions)
+            if next_state is None:
+                next_state = PositionState(next_positions, bool(next_positions & end_bit))
+                next_state.state_number = counter
+                counter += 1
+                afd.add_state(next_state)
+                check_state_limit(len(afd.states), max_states)
+                if stats is not None and len(afd.states) % PROGRESS_INTERVAL == 0:
+                    stats.progress('afd_states', len(afd.states))
+                states_index[next_positions] = next_state
+                unprocessed_states.append(next_state)
+            current_state.add_transition(symbol, next_state)
+            transitions += 1
+
+    if stats is not None:
+        stats.count('followpos_positions', len(labels))
+        stats.count('afd_transitions', transitions)
+        stats.size('afd_states', len(afd.states))
+
+    return afd
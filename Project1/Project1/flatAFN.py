@@ -0,0 +1,278 @@
+from array import array
+from charClass import EPSILON, label_matches
+from AFNsimulator import State, AFN
+from repetition import Repetition
+
+# Valor usado en los arreglos para indicar que no hay estado
+NO_STATE = -1
+
+# Cantidad de hijos de cada operador en la expresion postfix
+ARITY = {'*': 1, '+': 1, '?': 1, '|': 2, '^': 2}
+
+
+# Clase que representa un AFN de Thompson guardado en arreglos planos en lugar de objetos State.
+# En la construccion de Thompson cada estado tiene a lo sumo una transicion con simbolo y a lo
+# sumo dos transiciones epsilon, asi que basta con un arreglo por tipo de transicion indexado por
+# el numero de estado. La construccion es iterativa y no depende de la profundidad de la expresion.
+class FlatAFN:
+
+    def __init__(self):
+
+        self.labels = []                # Estado -> simbolo de su transicion (None si no tiene)
+        self.targets = array('i')       # Estado -> destino de la transicion con simbolo
+        self.epsilons = array('i')      # Estado i -> destinos epsilon en las posiciones 2i y 2i+1
+        self.start = NO_STATE
+        self.end = NO_STATE
+
+
+    # Cantidad de estados del AFN
+    def __len__(self):
+
+        return len(self.labels)
+
+
+    # Agrega un estado sin transiciones y retorna su numero
+    def add_state(self):
+
+        self.labels.append(None)
+        self.targets.append(NO_STATE)
+        self.epsilons.append(NO_STATE)
+        self.epsilons.append(NO_STATE)
+        return len(self.labels) - 1
+
+
+    # Agrega una transicion epsilon del estado state al estado target
+    def add_epsilon(self, state, target):
+
+        slot = 2 * state
+        if self.epsilons[slot] != NO_STATE:
+            slot += 1
+        self.epsilons[slot] = target
+
+
+    # Aplica un simbolo de la expresion postfix sobre la pila de fragmentos (inicio, fin, primer estado).
+    # Los estados de un fragmento son el rango desde su primer estado hasta el ultimo estado creado.
+    # arity es la cantidad de fragmentos que consume: 0 para literales, 1 para '*', '+', '?' y las
+    # repeticiones, y 2 para '|' y '^'.
+    def push(self, fragments, value, arity):
+
+        if len(fragments) < arity:
+            raise Exception("Invalid expression")
+
+        # Repeticion {m,n}: se copia el rango de estados del fragmento y las copias se combinan con
+        # los mismos fragmentos de '^', '+', '*' y '?' (ver thompson_repetition)
+        if arity == 1 and isinstance(value, Repetition):
+            self.push_repetition(fragments, value)
+            return
+
+        # Literal: inicio --simbolo--> fin (ε es una transicion epsilon)
+        if arity == 0:
+            start = self.add_state()
+            end = self.add_state()
+            if value == EPSILON:
+                self.add_epsilon(start, end)
+            else:
+                self.labels[start] = value
+                self.targets[start] = end
+            fragments.append((start, end, start))
+
+        # Kleene '*': el fragmento interno se puede saltar o repetir
+        elif value == '*':
+            inner_start, inner_end, first = fragments.pop()
+            start = self.add_state()
+            end = self.add_state()
+            self.add_epsilon(start, inner_start)
+            self.add_epsilon(start, end)
+            self.add_epsilon(inner_end, inner_start)
+            self.add_epsilon(inner_end, end)
+            fragments.append((start, end, first))
+
+        # '+': el fragmento interno se puede repetir pero no saltar
+        elif value == '+':
+            inner_start, inner_end, first = fragments.pop()
+            start = self.add_state()
+            end = self.add_state()
+            self.add_epsilon(start, inner_start)
+            self.add_epsilon(inner_end, inner_start)
+            self.add_epsilon(inner_end, end)
+            fragments.append((start, end, first))
+
+        # '?': el fragmento interno se puede saltar
+        elif value == '?':
+            inner_start, inner_end, first = fragments.pop()
+            start = self.add_state()
+            end = self.add_state()
+            self.add_epsilon(start, inner_start)
+            self.add_epsilon(start, end)
+            self.add_epsilon(inner_end, end)
+            fragments.append((start, end, first))
+
+        # Alternancia '|': un inicio y un fin nuevos alrededor de ambos fragmentos
+        elif value == '|':
+            right_start, right_end, _ = fragments.pop()
+            left_start, left_end, first = fragments.pop()
+            start = self.add_state()
+            end = self.add_state()
+            self.add_epsilon(start, left_start)
+            self.add_epsilon(start, right_start)
+            self.add_epsilon(left_end, end)
+            self.add_epsilon(right_end, end)
+            fragments.append((start, end, first))
+
+        # Concatenacion '^': el fin de la izquierda se conecta al inicio de la derecha
+        elif value == '^':
+            right_start, right_end, _ = fragments.pop()
+            left_start, left_end, first = fragments.pop()
+            self.add_epsilon(left_end, right_start)
+            fragments.append((left_start, right_end, first))
+
+        else:
+            raise Exception("Invalid expression")
+
+
+    # Construye X{m,n} con el fragmento de X en la cima de la pila
+    def push_repetition(self, fragments, repetition):
+
+        start, end, first = fragments.pop()
+        count = repetition.copies()
+        if count == 0:
+            self.push(fragments, EPSILON, 0)
+            return
+
+        # Copiar el rango de estados del fragmento, desplazando los destinos
+        last = len(self.labels)
+        copies = [(start, end, first)]
+        for _ in range(count - 1):
+            shift = len(self.labels) - first
+            self.labels.extend(self.labels[first:last])
+            self.targets.extend(t + shift if t != NO_STATE else NO_STATE for t in self.targets[first:last])
+            self.epsilons.extend(t + shift if t != NO_STATE else NO_STATE for t in self.epsilons[2 * first:2 * last])
+            copies.append((start + shift, end + shift, first + shift))
+
+        minimum = repetition.minimum
+        if repetition.maximum is None:
+            if minimum == 0:
+                fragments.append(copies[0])
+                self.push(fragments, '*', 1)
+                return
+            mandatory = len(copies)
+            optional = 0
+        else:
+            mandatory = minimum
+            optional = len(copies) - minimum
+
+        # Apilar las copias en orden y combinarlas de derecha a izquierda
+        base = len(fragments)
+        fragments.extend(copies)
+        if repetition.maximum is None:
+            self.push(fragments, '+', 1)
+        else:
+            for i in range(optional):
+                self.push(fragments, '?', 1)
+                if i < optional - 1:
+                    self.push(fragments, '^', 2)
+        for _ in range(len(fragments) - base - 1):
+            self.push(fragments, '^', 2)
+
+
+    # Fija el inicio y el fin del AFN con el unico fragmento que debe quedar en la pila
+    def finish(self, fragments):
+
+        if len(fragments) != 1:
+            raise Exception("Invalid expression")
+        self.start, self.end, _ = fragments[0]
+        return self
+
+
+    # Construye el AFN directamente desde la lista postfix, sin crear el arbol sintactico
+    @staticmethod
+    def from_postfix(postfix):
+
+        afn = FlatAFN()
+        fragments = []
+        for token in postfix:
+            if isinstance(token, Repetition):
+                arity = 1
+            else:
+                arity = ARITY.get(token, 0) if isinstance(token, str) else 0
+            afn.push(fragments, token, arity)
+        return afn.finish(fragments)
+
+
+    # Construye el AFN desde un arbol sintactico recorriendolo en postorden con una pila explicita
+    @staticmethod
+    def from_tree(root):
+
+        afn = FlatAFN()
+        fragments = []
+        nodes_to_visit = [(root, False)]
+        while nodes_to_visit:
+            node, expanded = nodes_to_visit.pop()
+            if node.children and not expanded:
+                nodes_to_visit.append((node, True))
+                for child in reversed(node.children):
+                    nodes_to_visit.append((child, False))
+            else:
+                afn.push(fragments, node.value, len(node.children))
+        return afn.finish(fragments)
+
+
+    # Calcula el cierre epsilon de un conjunto de numeros de estado
+    def epsilon_closure(self, states):
+
+        epsilons = self.epsilons
+        stack = list(states)
+        closure = set(states)
+        while stack:
+            state = stack.pop()
+            for slot in (2 * state, 2 * state + 1):
+                next_state = epsilons[slot]
+                if next_state != NO_STATE and next_state not in closure:
+                    closure.add(next_state)
+                    stack.append(next_state)
+        return closure
+
+
+    # Calcula el conjunto de estados (ya cerrado bajo epsilon) alcanzable desde current con un simbolo
+    def step(self, current, symbol):
+
+        labels = self.labels
+        targets = self.targets
+        next_states = set()
+        for state in current:
+            label = labels[state]
+            if label is not None and label_matches(label, symbol):
+                next_states.add(targets[state])
+        return self.epsilon_closure(next_states)
+
+
+    # Retorna True si el AFN acepta la cadena de entrada
+    def accepts(self, input_string):
+
+        current = self.epsilon_closure((self.start,))
+        for symbol in input_string:
+            current = self.step(current, symbol)
+            if not current:
+                return False
+        return self.end in current
+
+
+    # Convierte el AFN a la representacion con objetos State, para usarlo con el resto del
+    # proyecto (construccion de subconjuntos, visualizacion, BitsetAFN, etc.)
+    def to_afn(self):
+
+        states = [State() for _ in range(len(self.labels))]
+        for i, state in enumerate(states):
+            if self.targets[i] != NO_STATE:
+                state.add_transition(self.labels[i], states[self.targets[i]])
+            for slot in (2 * i, 2 * i + 1):
+                if self.epsilons[slot] != NO_STATE:
+                    state.add_transition(None, states[self.epsilons[slot]])
+        return AFN(states[self.start], states[self.end])
+
+
+
+# Simula el AFN plano para una cadena de entrada dada
+def simulate_flat_afn(flat_afn, input_string):
+
+    return flat_afn.accepts(input_string)
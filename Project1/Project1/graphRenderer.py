@@ -0,0 +1,112 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from graphviz import Digraph
+
+# Cantidad maxima de nodos que se dibujan; los grafos mas grandes se reemplazan por un resumen
+DEFAULT_MAX_NODES = 500
+
+# Formatos de salida: 'dot' solo escribe el archivo fuente y no necesita el ejecutable de Graphviz
+FORMATS = ('pdf', 'svg', 'png', 'dot')
+
+
+# Cuenta los nodos de un arbol sintactico
+def tree_size(root):
+
+    count = 0
+    nodes_to_visit = [root] if root else []
+    while nodes_to_visit:
+        node = nodes_to_visit.pop()
+        count += 1
+        nodes_to_visit.extend(node.children)
+    return count
+
+
+# Grafo de un solo nodo que resume un automata demasiado grande para dibujarlo
+def summary_graph(title, nodes, edges=None):
+
+    dot = Digraph()
+    text = f"{title}\n{nodes} nodos" + (f", {edges} aristas" if edges is not None else "")
+    dot.node('summary', label=f"{text}\n(supera el limite de dibujo)", shape="box")
+    return dot
+
+
+
+# Clase que dibuja los graficos del arbol sintactico y de los automatas en segundo plano.
+# Cada grafico se arma y se escribe en un hilo del grupo (Graphviz corre como un proceso aparte),
+# asi el programa puede seguir con la siguiente etapa o expresion mientras se dibuja.
+# format es uno de FORMATS; con view=False no se abre el visor (modo sin interfaz).
+# Los grafos con mas de max_nodes nodos se reemplazan por un resumen (None es sin limite).
+class GraphRenderer:
+
+    def __init__(self, directory='.', format='pdf', view=True, max_nodes=DEFAULT_MAX_NODES, workers=2):
+
+        if format not in FORMATS:
+            raise ValueError(f"Formato de grafico desconocido: {format}")
+        self.directory = directory
+        self.format = format
+        self.view = view and format != 'dot'
+        self.max_nodes = max_nodes
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.pending = []       # Lista de (nombre, future) de los graficos enviados
+
+
+    # Envia un grafico para dibujarlo en segundo plano. build() retorna el Digraph y solo se llama si
+    # size (nodos, aristas) no supera el limite; si lo supera se dibuja un resumen.
+    def submit(self, name, build, size):
+
+        nodes, edges = size
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            build = lambda: summary_graph(name, nodes, edges)
+        self.pending.append((name, self.pool.submit(self.render, name, build)))
+
+
+    # Arma el grafico y lo escribe; retorna la ruta del archivo generado
+    def render(self, name, build):
+
+        dot = build()
+        path = os.path.join(self.directory, name)
+        if self.format == 'dot':
+            return dot.save(path + '.dot')
+        return dot.render(path, format=self.format, view=self.view, cleanup=True)
+
+
+    # Envia el grafico del arbol sintactico; el tamaño es la cantidad de nodos del arbol
+    def render_tree(self, name, tree_maker, root):
+
+        self.submit(name, lambda: tree_maker.visualize_tree(root), (tree_size(root), None))
+
+
+    # Envia el grafico de un AFN; el tamaño son sus estados y transiciones alcanzables
+    def render_afn(self, name, afn):
+
+        self.submit(name, afn.visualize_afn, afn.size())
+
+
+    # Envia el grafico de un AFD (o del AFD minimizado); el tamaño son sus estados y transiciones
+    def render_afd(self, name, afd):
+
+        edges = sum(len(state.transitions) for state in afd.states)
+        self.submit(name, afd.visualize_afd, (len(afd.states), edges))
+
+
+    # Espera los graficos enviados y retorna las rutas generadas. Los errores (por ejemplo, si no
+    # esta instalado el ejecutable de Graphviz) se reportan en la salida de errores.
+    def wait(self):
+
+        paths = []
+        for name, future in self.pending:
+            try:
+                paths.append(future.result())
+            except Exception as error:
+                print(f"No se pudo dibujar '{name}': {error}", file=sys.stderr)
+        self.pending = []
+        return paths
+
+
+    # Espera los graficos pendientes, libera los hilos y retorna las rutas generadas
+    def close(self):
+
+        paths = self.wait()
+        self.pool.shutdown()
+        return paths
@@ -0,0 +1,105 @@
+# Clase que representa un estado del AFD perezoso: un conjunto de estados del AFN (mapa de bits)
+# y las transiciones que ya se calcularon desde el
+class LazyAFDState:
+
+    __slots__ = ('mask', 'transitions', 'is_final')
+
+    def __init__(self, mask, is_final):
+
+        self.mask = mask                # Conjunto de estados del AFN como mapa de bits
+        self.transitions = {}           # Simbolo -> LazyAFDState, llenado a medida que se usa
+        self.is_final = is_final        # Es un estado final si/no
+
+
+
+# Clase que simula un AFD construido bajo demanda sobre un BitsetAFN.
+# Los estados del AFD se crean solo cuando la entrada los alcanza por primera vez y se guardan
+# en un cache limitado a max_states; al llenarse el cache se vacia por completo. Si durante una
+# misma cadena el cache se vacia max_flushes veces sin haber avanzado al menos min_progress
+# simbolos por estado creado, el recorrido continua paso a paso sobre el AFN.
+class LazyAFD:
+
+    def __init__(self, bitset_afn, max_states=10000, max_flushes=3, min_progress=10):
+
+        self.afn = bitset_afn
+        self.max_states = max_states
+        self.max_flushes = max_flushes
+        self.min_progress = min_progress
+        self.cache = {}             # Mapa de bits -> LazyAFDState
+        self.flushes = 0            # Numero total de veces que se vacio el cache
+        self.nfa_fallbacks = 0      # Numero de cadenas que terminaron simulando el AFN
+        self.dead_state = LazyAFDState(0, False)
+        self.start_state = self.get_state(bitset_afn.start_mask)
+
+
+    # Retorna el estado del AFD para un conjunto de estados del AFN, creandolo si no existe
+    def get_state(self, mask):
+
+        if not mask:
+            return self.dead_state
+
+        state = self.cache.get(mask)
+        if state is None:
+            state = LazyAFDState(mask, self.afn.is_accepting(mask))
+            self.cache[mask] = state
+        return state
+
+
+    # Vacia el cache de estados; el estado inicial y el estado actual se vuelven a crear
+    def flush(self, current_mask):
+
+        self.cache = {}
+        self.flushes += 1
+        self.start_state = self.get_state(self.afn.start_mask)
+        return self.get_state(current_mask)
+
+
+    # Retorna True si el AFD perezoso acepta la cadena de entrada
+    def accepts(self, input_string):
+
+        state = self.start_state
+        flushes = 0         # Vaciados del cache durante esta cadena
+        progress = 0        # Simbolos leidos desde el ultimo vaciado
+
+        for position, symbol in enumerate(input_string):
+            next_state = state.transitions.get(symbol)
+
+            # Transicion aun no calculada: construirla sobre el AFN
+            if next_state is None:
+                if len(self.cache) >= self.max_states:
+                    # El cache se vacia con muy poco avance: se considera que esta saturado
+                    if progress < self.min_progress * self.max_states:
+                        flushes += 1
+                        if flushes > self.max_flushes:
+                            self.nfa_fallbacks += 1
+                            return self.accepts_nfa(state.mask, input_string, position)
+                    state = self.flush(state.mask)
+                    progress = 0
+
+                next_state = self.get_state(self.afn.step(state.mask, symbol))
+                state.transitions[symbol] = next_state
+
+            if next_state is self.dead_state:
+                return False
+            state = next_state
+            progress += 1
+
+        return state.is_final
+
+
+    # Continua el recorrido directamente sobre el AFN desde la posicion dada
+    def accepts_nfa(self, current, input_string, position):
+
+        afn = self.afn
+        for i in range(position, len(input_string)):
+            current = afn.step(current, input_string[i])
+            if not current:
+                return False
+        return afn.is_accepting(current)
+
+
+
+# Simula el AFD perezoso para una cadena de entrada dada
+def simulate_lazy_afd(lazy_afd, input_string):
+
+    return lazy_afd.accepts(input_string)
@@ -0,0 +1,96 @@
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import State, thompson_from_tree
+from AFDsimulator import convert_to_afd, hopcroft_partitions, build_minimized_afd
+from AFDcompiler import CompiledAFD, compile_afd
+from stateLimit import DEFAULT_MAX_STATES, check_state_limit, estimate_states
+from compileStats import stage
+
+
+# Clase que representa la union de varios AFN bajo un estado inicial compartido.
+# Cada AFN conserva sus estados finales, asociados al numero de patron (0, 1, ...).
+class MultiAFN:
+
+    def __init__(self, afns):
+
+        self.start_state = State()
+        self.end_states = {}    # Estado final -> numero de patron
+
+        for pattern_id, afn in enumerate(afns):
+            # Transicion epsilon desde el inicio compartido hacia el inicio de cada AFN
+            self.start_state.add_transition(None, afn.start_state)
+            for end_state in afn.final_states():
+                self.end_states[end_state] = pattern_id
+
+
+
+# Clase que representa un AFD compilado donde cada estado conoce los patrones que acepta
+class CompiledMultiAFD(CompiledAFD):
+
+    def __init__(self, columns, num_columns, table, accept, start, row_patterns, default_column=None):
+
+        super().__init__(columns, num_columns, table, accept, start, default_column)
+        self.row_patterns = row_patterns    # Fila -> tupla ordenada de numeros de patron
+
+
+    # Retorna los patrones aceptados en el estado dado (desplazamiento)
+    def patterns_at(self, state):
+
+        return self.row_patterns[state // self.num_columns]
+
+
+    # Retorna la tupla de patrones que aceptan la cadena completa, con un solo recorrido
+    def matches(self, data):
+
+        return self.patterns_at(self.run(self.start, self.to_columns(data)))
+
+
+
+# Etiqueta cada estado del AFD con el conjunto de patrones cuyo estado final contiene
+def tag_patterns(afd, multi_afn):
+
+    end_states = multi_afn.end_states
+    for state in afd.states:
+        state.patterns = frozenset(end_states[s] for s in state.afn_states if s in end_states)
+
+
+# Minimiza un AFD etiquetado sin mezclar estados que aceptan conjuntos de patrones distintos
+def minimize_multi_afd(afd, stats=None):
+
+    partitions = hopcroft_partitions(afd, lambda s: s.patterns, stats)
+    minimized = build_minimized_afd(afd, partitions)
+
+    # Cada estado nuevo corresponde a la particion en la misma posicion
+    for partition, state in zip(partitions, minimized.states):
+        state.patterns = next(iter(partition)).patterns
+    return minimized
+
+
+# Compila todas las expresiones en un solo AFD minimizado: los AFN de Thompson se unen bajo
+# un estado inicial compartido y la construccion de subconjuntos se ejecuta una sola vez.
+# max_states limita el tamaño estimado de los AFN y del AFD combinado (ver StateLimitError).
+# Con stats (CompileStats) se mide cada etapa.
+def compile_patterns(infixes, max_states=DEFAULT_MAX_STATES, stats=None):
+
+    converter = ShuntingYard()
+    tree_maker = SyntaxTree()
+    with stage(stats, 'infixToPostfix'):
+        postfixes = [converter.infixToPostfix(infix) for infix in infixes]
+    with stage(stats, 'build_tree'):
+        roots = [tree_maker.build_tree(postfix) for postfix in postfixes]
+    check_state_limit(sum(estimate_states(root) for root in roots), max_states)
+    with stage(stats, 'thompson_from_tree'):
+        afns = [thompson_from_tree(root) for root in roots]
+
+    multi_afn = MultiAFN(afns)
+    with stage(stats, 'convert_to_afd'):
+        afd = convert_to_afd(multi_afn, max_states, stats)
+    tag_patterns(afd, multi_afn)
+    with stage(stats, 'minimize_afd'):
+        afd = minimize_multi_afd(afd, stats)
+
+    with stage(stats, 'compile_afd'):
+        compiled = compile_afd(afd)
+    row_patterns = [()] + [tuple(sorted(state.patterns)) for state in afd.states]
+    return CompiledMultiAFD(compiled.columns, compiled.num_columns, compiled.table, compiled.accept,
+                            compiled.start, row_patterns, compiled.default_column)
@@ -0,0 +1,137 @@
+import os
+import struct
+import hashlib
+import tempfile
+from collections import OrderedDict
+from AFDcompiler import CompiledAFD, MappedAFD, FORMAT_VERSION, compile_regex
+from stateLimit import DEFAULT_MAX_STATES
+
+# Version de las entradas del cache en disco. Se incrementa cuando cambia la forma en que se
+# construyen los automatas, para que las entradas anteriores dejen de usarse.
+#   2: ε es la cadena vacia y no un simbolo
+#   3: el tokenizador de una pasada cambia el analisis de clases y concatenaciones
+#   4: '+' y '?' son nodos propios del arbol
+#   5: repeticiones {m}, {m,} y {m,n}
+#   6: '\' escapa el caracter siguiente
+CACHE_VERSION = 6
+
+# Directorio y tamaño por defecto del cache
+DEFAULT_CACHE_DIR = '.afd_cache'
+DEFAULT_MAX_ENTRIES = 256
+
+
+# Normaliza una expresion regular de la misma forma en que Main lee regex.txt
+def normalize_regex(infix):
+
+    return infix.strip().replace(" ", "")
+
+
+# Clase que guarda los AFD minimizados y compilados por expresion regular normalizada.
+# Tiene un cache LRU en memoria y, si se indica un directorio, un almacenamiento en disco con el
+# formato binario de CompiledAFD, de modo que un proceso nuevo no repite todo el proceso de compilacion.
+# Con mapped=True las entradas en disco se cargan con mmap (MappedAFD) en lugar de copiarse.
+# Con utf8=True se guardan automatas sobre bytes UTF-8 (ver compile_regex). construction solo cambia
+# como se compilan las expresiones nuevas: el AFD minimizado es el mismo con cualquier metodo.
+# max_states es el limite de estados al compilar (ver compile_regex).
+class PatternCache:
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, mapped=False, utf8=False,
+                 construction='thompson', max_states=DEFAULT_MAX_STATES):
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.mapped = mapped
+        self.utf8 = utf8
+        self.construction = construction
+        self.max_states = max_states
+        self.entries = OrderedDict()    # Expresion normalizada -> CompiledAFD, en orden de uso
+        self.hits = 0                   # Encontrados en memoria
+        self.disk_hits = 0              # Encontrados en disco
+        self.misses = 0                 # Compilados desde cero
+
+
+    # Ruta del archivo en disco para una expresion normalizada. La clave incluye el limite de estados,
+    # asi una entrada compilada con un limite mayor no se usa en un cache con un limite menor.
+    def path_for(self, key):
+
+        mode = 'utf8' if self.utf8 else 'text'
+        digest = hashlib.sha256(f"{CACHE_VERSION}:{FORMAT_VERSION}:{mode}:{self.max_states}:{key}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + '.afd')
+
+
+    # Retorna el AFD compilado para la expresion, buscando en memoria, luego en disco y compilando si hace falta.
+    # Con stats (CompileStats) se registra de donde salio el AFD y, si se compilo, cada etapa.
+    def get(self, infix, stats=None):
+
+        key = normalize_regex(infix)
+
+        compiled = self.entries.get(key)
+        if compiled is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if stats is not None:
+                stats.count('cache_hits')
+            return compiled
+
+        compiled = self.load(key)
+        if compiled is not None:
+            self.disk_hits += 1
+            if stats is not None:
+                stats.count('cache_disk_hits')
+        else:
+            compiled = compile_regex(key, self.utf8, self.construction, self.max_states, stats)
+            self.misses += 1
+            self.store(key, compiled)
+
+        self.remember(key, compiled)
+        return compiled
+
+
+    # Agrega una entrada al cache en memoria, descartando la menos usada si se excede el tamaño
+    def remember(self, key, compiled):
+
+        self.entries[key] = compiled
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+    # Carga una entrada desde disco; retorna None si no existe o no es valida (cortada o corrupta)
+    def load(self, key):
+
+        if not self.cache_dir:
+            return None
+        try:
+            if self.mapped:
+                return MappedAFD(self.path_for(key))
+            with open(self.path_for(key), 'rb') as file:
+                return CompiledAFD.from_bytes(file.read())
+        except (OSError, ValueError, struct.error):
+            return None
+
+
+    # Guarda una entrada en disco de forma atomica (archivo temporal + reemplazo)
+    def store(self, key, compiled):
+
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(compiled.to_bytes())
+            os.replace(tmp_path, self.path_for(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+
+# Cache compartido por defecto del proceso
+default_cache = PatternCache()
+
+
+# Retorna el AFD compilado para la expresion usando el cache compartido
+def compile_cached(infix):
+
+    return default_cache.get(infix)
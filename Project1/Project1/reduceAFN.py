@@ -0,0 +1,168 @@
+from AFNsimulator import State, AFN, epsilon_closure
+from directAFD import followpos_from_tree
+
+
+# Construye un AFN equivalente sin transiciones epsilon: cada estado nuevo corresponde a un estado
+# del AFN original que es el inicial o el destino de una transicion con simbolo, y tiene las
+# transiciones con simbolo de todo su cierre epsilon. Es final si su cierre contiene un estado final.
+# Los estados que solo se alcanzan con epsilon desaparecen, asi que el AFN resultante puede tener
+# varios estados finales y no tiene end_state (ver AFN, multiple_finals).
+def remove_epsilons(afn):
+
+    copies = {afn.start_state: State()}
+    states_to_visit = [afn.start_state]
+    while states_to_visit:
+        current_state = states_to_visit.pop()
+        copy = copies[current_state]
+        for closure_state in epsilon_closure({current_state}):
+            if closure_state.is_final:
+                copy.is_final = True
+            for label, next_states in closure_state.transitions.items():
+                if label is None:
+                    continue
+                for next_state in next_states:
+                    if next_state not in copies:
+                        copies[next_state] = State()
+                        states_to_visit.append(next_state)
+                    copy.add_transition(label, copies[next_state])
+
+    return AFN(copies[afn.start_state], multiple_finals=True)
+
+
+# Retorna la lista de estados alcanzables desde el estado inicial, empezando por el inicial
+def reachable_states(afn):
+
+    states = [afn.start_state]
+    visited = {afn.start_state}
+    i = 0
+    while i < len(states):
+        for next_states in states[i].transitions.values():
+            for next_state in next_states:
+                if next_state not in visited:
+                    visited.add(next_state)
+                    states.append(next_state)
+        i += 1
+    return states
+
+
+# Elimina los estados muertos (desde los que no se alcanza ningun estado final) y las transiciones
+# hacia ellos. Los estados inalcanzables ya no forman parte del AFN, que se recorre desde el inicial.
+# Modifica el AFN y lo retorna.
+def prune_states(afn):
+
+    states = reachable_states(afn)
+
+    # Transiciones invertidas: estado -> estados con una transicion hacia el
+    predecessors = {state: [] for state in states}
+    for state in states:
+        for next_states in state.transitions.values():
+            for next_state in next_states:
+                predecessors[next_state].append(state)
+
+    # Estados vivos: los que alcanzan un estado final
+    live = {state for state in states if state.is_final}
+    states_to_visit = list(live)
+    while states_to_visit:
+        for previous_state in predecessors[states_to_visit.pop()]:
+            if previous_state not in live:
+                live.add(previous_state)
+                states_to_visit.append(previous_state)
+
+    for state in states:
+        transitions = {}
+        for label, next_states in state.transitions.items():
+            next_states = [next_state for next_state in next_states if next_state in live]
+            if next_states:
+                transitions[label] = next_states
+        state.transitions = transitions
+
+    return afn
+
+
+# Une los estados que tienen las mismas transiciones (mismo simbolo hacia los mismos estados) y
+# la misma aceptacion. Al unir estados, otros pueden quedar con transiciones iguales, asi que se
+# repite hasta que no cambia la cantidad de grupos. Retorna un AFN nuevo con un estado por grupo
+# y sin end_state (los finales se marcan con is_final).
+def merge_states(afn):
+
+    states = reachable_states(afn)
+    index = {state: i for i, state in enumerate(states)}
+    groups = list(range(len(states)))     # Estado -> numero de su grupo
+    count = len(states)
+
+    while True:
+        signatures = {}
+        new_groups = []
+        for state in states:
+            signature = (state.is_final, frozenset(
+                (label, frozenset(groups[index[next_state]] for next_state in next_states))
+                for label, next_states in state.transitions.items()))
+            new_groups.append(signatures.setdefault(signature, len(signatures)))
+        groups = new_groups
+        if len(signatures) == count:
+            break
+        count = len(signatures)
+
+    # Un estado nuevo por grupo, con las transiciones del primer estado del grupo
+    merged = [None] * count
+    for state in states:
+        group = groups[index[state]]
+        if merged[group] is None:
+            merged[group] = State()
+            merged[group].is_final = state.is_final
+    done = set()
+    for state in states:
+        group = groups[index[state]]
+        if group in done:
+            continue
+        done.add(group)
+        for label, next_states in state.transitions.items():
+            for next_state in next_states:
+                merged[group].add_transition(label, merged[groups[index[next_state]]])
+
+    return AFN(merged[groups[0]], multiple_finals=True)
+
+
+# Reduce un AFN antes de la construccion de subconjuntos: elimina las transiciones epsilon, los
+# estados muertos e inalcanzables, y une los estados con transiciones iguales. El AFN original no cambia.
+# Con stats (CompileStats) se registran los estados y transiciones antes y despues.
+def reduce_afn(afn, stats=None):
+
+    if stats is not None:
+        afn_states, afn_edges = afn.size()
+        stats.size('afn_states', afn_states)
+        stats.size('afn_edges', afn_edges)
+
+    reduced = merge_states(prune_states(remove_epsilons(afn)))
+
+    if stats is not None:
+        reduced_states, reduced_edges = reduced.size()
+        stats.size('reduced_afn_states', reduced_states)
+        stats.size('reduced_afn_edges', reduced_edges)
+    return reduced
+
+
+# Construye el automata de posiciones (Glushkov) de un arbol sintactico: un estado inicial mas un
+# estado por hoja, sin transiciones epsilon. Hay una transicion con el simbolo de la posicion q desde
+# el inicial si q esta en firstpos de la raiz, y desde la posicion p si q esta en followpos(p).
+# Son finales las posiciones seguidas por el marcador de fin (y el inicial si la expresion es nullable).
+def glushkov_afn(root):
+
+    first, labels, followpos, end_position = followpos_from_tree(root)
+    end_bit = 1 << end_position
+
+    start = State()
+    states = [State() for _ in range(end_position)]
+    start.is_final = bool(first & end_bit)
+    for position, state in enumerate(states):
+        state.is_final = bool(followpos[position] & end_bit)
+
+    for source, positions in [(start, first)] + list(zip(states, followpos)):
+        positions &= ~end_bit
+        while positions:
+            low = positions & -positions
+            position = low.bit_length() - 1
+            source.add_transition(labels[position], states[position])
+            positions ^= low
+
+    return AFN(start, multiple_finals=True)
@@ -0,0 +1,418 @@
+import io
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import simulate_afn
+from AFDsimulator import convert_to_afd, minimize_afd, simulate_afd
+from AFDcompiler import CONSTRUCTIONS, CompiledAFD, build_afn, build_afd
+from bitsetAFN import BitsetAFN
+from lazyAFD import LazyAFD
+from stateLimit import DEFAULT_MAX_STATES, check_state_limit, estimate_states
+from compileStats import stage
+from compileBudget import CompileBudget, FALLBACKS, compile_with_budget, accepts_utf8
+from patternCache import PatternCache, DEFAULT_CACHE_DIR
+from batchMatcher import match_batch, match_batch_parallel, read_lines, DEFAULT_BLOCK_SIZE
+from graphRenderer import GraphRenderer, FORMATS, DEFAULT_MAX_NODES, tree_size
+
+# Representaciones que se pueden construir para cada expresion
+STAGES = ('tree', 'afn', 'afd', 'min')
+
+# Motores para evaluar las cadenas y las representaciones que necesita cada uno
+MATCH_ENGINES = {
+    'afn': ('afn',),                # simulate_afn sobre el AFN
+    'bitset': ('afn',),             # BitsetAFN
+    'lazy': ('afn',),               # LazyAFD sobre el BitsetAFN
+    'afd': ('afd',),                # simulate_afd sobre el AFD sin minimizar
+    'min': ('afd', 'min'),          # simulate_afd sobre el AFD minimizado
+    'compiled': (),                 # Tabla del AFD minimizado (CompiledAFD), tomada de PatternCache
+}
+
+OUTPUT_FORMATS = ('jsonl', 'tsv')
+
+
+
+# Clase que adapta una funcion de simulacion (simulate_afn, simulate_afd) a la interfaz accepts
+# de los demas motores
+class Simulation:
+
+    def __init__(self, simulate, automaton):
+
+        self.simulate = simulate
+        self.automaton = automaton
+
+
+    # Retorna True si el automata acepta la cadena de entrada
+    def accepts(self, input_string):
+
+        return self.simulate(self.automaton, input_string)
+
+
+
+# Lee las expresiones de un archivo ('-' es la entrada estandar), sin espacios y omitiendo las lineas vacias
+def read_patterns(path):
+
+    file = sys.stdin if path == '-' else io.open(path, 'r', encoding='utf-8')
+    try:
+        for line in file:
+            infix = line.strip().replace(" ", "")
+            if infix:
+                yield infix
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+# Retorna una funcion que produce las cadenas de entrada en cada llamada. Un archivo se vuelve a leer
+# para cada expresion; la entrada estandar ('-') se lee una sola vez y se guarda en memoria.
+# Con binary=True las cadenas son bytes, sin decodificar.
+def subject_reader(path, binary=False):
+
+    if path != '-':
+        return lambda: read_lines(path, binary)
+    if binary:
+        subjects = [line.rstrip(b'\r\n') for line in sys.stdin.buffer]
+    else:
+        subjects = [line.rstrip('\r\n') for line in sys.stdin]
+    return lambda: iter(subjects)
+
+
+# Construye las representaciones pedidas en stages de una expresion, con los limites de budget
+# (CompileBudget). Retorna un diccionario etapa -> arbol, AFN o AFD.
+def build_stages(infix, stages, construction, budget):
+
+    if 'min' in stages:
+        stages = set(stages) | {'afd'}
+
+    with stage(budget, 'infixToPostfix'):
+        postfix = ShuntingYard().infixToPostfix(infix)
+    with stage(budget, 'build_tree'):
+        root = SyntaxTree().build_tree(postfix)
+    built = {'tree': root}
+    budget.size('tree_nodes', tree_size(root))
+
+    check_state_limit(estimate_states(root), budget.max_states)
+    if 'afn' in stages:
+        # La construccion directa no genera un AFN; para verlo se usa el de Thompson
+        afn = build_afn(root, 'thompson' if construction == 'direct' else construction, budget)
+        afn.assign_state_numbers()
+        built['afn'] = afn
+    if 'afd' in stages:
+        if 'afn' in built and construction != 'direct':
+            with stage(budget, 'convert_to_afd'):
+                built['afd'] = convert_to_afd(built['afn'], budget.max_states, budget)
+        else:
+            built['afd'] = build_afd(root, construction, budget.max_states, budget)
+    if 'min' in stages:
+        with stage(budget, 'minimize_afd'):
+            built['min'] = minimize_afd(built['afd'], stats=budget)
+    return built
+
+
+# Compila una expresion con compile_with_budget: construye las representaciones de stages y el
+# reconocedor de engine; el motor 'compiled' toma el AFD compilado de cache (PatternCache), que analiza
+# la expresion por su cuenta, asi que sin stages no se construye nada mas y las estadisticas son solo
+# las de esa compilacion. Si se excede el presupuesto se usa el motor fallback ('lazy' o 'bitset',
+# o None para fallar). Retorna (representaciones por etapa, reconocedor, motor usado).
+def compile_pattern(infix, stages, engine, construction, budget, fallback, cache):
+
+    built = {}
+    needed = set(stages) | set(MATCH_ENGINES[engine])
+
+    # Construye el reconocedor de engine dentro del presupuesto
+    def compile(infix, stats):
+        if needed:
+            built.update(build_stages(infix, needed, construction, stats))
+        if engine == 'compiled':
+            return cache.get(infix, stats)
+        if engine == 'afn':
+            return Simulation(simulate_afn, built['afn'])
+        if engine == 'bitset':
+            return BitsetAFN(built['afn'])
+        if engine == 'lazy':
+            return LazyAFD(BitsetAFN(built['afn']))
+        return Simulation(simulate_afd, built[engine])
+
+    matcher, used_engine = compile_with_budget(infix, budget, fallback, compile)
+    if used_engine == 'dfa' and engine != 'compiled':
+        used_engine = budget.engine = engine
+    return built, matcher, used_engine
+
+
+# Evalua las cadenas con un reconocedor y produce pares (cadena, aceptada). Los AFD compilados se
+# evaluan por bloques y, con workers > 1, en un grupo de procesos; los demas motores cadena por cadena.
+# Con utf8=True las cadenas son bytes; los motores sobre texto rechazan las que no son UTF-8 valido.
+def match_strings(matcher, strings, utf8=False, workers=1, chunk_size=DEFAULT_BLOCK_SIZE):
+
+    if isinstance(matcher, CompiledAFD):
+        if workers > 1:
+            return match_batch_parallel(matcher, strings, workers, chunk_size)
+        return match_batch(matcher, strings, chunk_size)
+    if utf8:
+        return ((w, accepts_utf8(matcher, w)) for w in strings)
+    return ((w, matcher.accepts(w)) for w in strings)
+
+
+# Envia a renderer los graficos de las representaciones pedidas en stages. Si la compilacion excedio
+# el presupuesto solo se dibujan las que se alcanzaron a construir.
+def render_pattern(renderer, index, built, stages):
+
+    if 'tree' in stages and 'tree' in built:
+        renderer.render_tree(f'arbol_sintactico_{index+1}', SyntaxTree(), built['tree'])
+    if 'afn' in stages and 'afn' in built:
+        renderer.render_afn(f'afn_{index+1}', built['afn'])
+    if 'afd' in stages and 'afd' in built:
+        renderer.render_afd(f'afd_{index+1}', built['afd'])
+    if 'min' in stages and 'min' in built:
+        renderer.render_afd(f'min_afd_{index+1}', built['min'])
+
+
+
+# Clase que escribe los resultados en un formato legible por programas: 'jsonl' escribe un objeto JSON
+# por linea (una linea 'pattern' al compilar cada expresion, una 'match' por cadena y una 'summary'
+# al terminar la expresion, o 'error' si no se pudo compilar o evaluar); 'tsv' escribe solo las cadenas
+# como "expresion<TAB>0|1<TAB>cadena" y los resumenes en la salida de errores, como el modo por lotes de Main.
+# Las cadenas en bytes (modo UTF-8) se escriben sin cambios en 'tsv' y con escapes en 'jsonl'.
+class ResultWriter:
+
+    def __init__(self, output, format='jsonl', matches_only=False):
+
+        self.output = output
+        self.format = format
+        self.matches_only = matches_only    # Escribir solo las cadenas aceptadas
+
+
+    # Escribe un objeto JSON en una linea
+    def write_json(self, record):
+
+        self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+    # Informa que una expresion se compilo, con el motor usado y sus estadisticas de compilacion
+    def pattern(self, index, infix, budget):
+
+        if self.format == 'jsonl':
+            self.write_json({'type': 'pattern', 'pattern': index+1, 'regex': infix, **budget.to_dict()})
+        elif budget.fallback_reason is not None:
+            print(f"Expresion {index+1} '{infix}': {budget.fallback_reason}; se usa el motor {budget.engine}", file=sys.stderr)
+
+
+    # Escribe el resultado de una cadena
+    def match(self, index, w, accepted):
+
+        if self.matches_only and not accepted:
+            return
+        if self.format == 'jsonl':
+            if isinstance(w, bytes):
+                w = w.decode('utf-8', 'backslashreplace')
+            self.write_json({'type': 'match', 'pattern': index+1, 'subject': w, 'accepted': bool(accepted)})
+        else:
+            if isinstance(w, bytes):
+                w = w.decode('utf-8', 'surrogateescape')
+            self.output.write(f"{index+1}\t{int(accepted)}\t{w}\n")
+
+
+    # Escribe el resumen de una expresion: cadenas evaluadas, aceptadas y tiempo
+    def summary(self, index, infix, count, accepted, seconds):
+
+        rate = count / seconds if seconds > 0 else None
+        if self.format == 'jsonl':
+            self.write_json({'type': 'summary', 'pattern': index+1, 'subjects': count, 'accepted': accepted,
+                             'seconds': seconds, 'strings_per_second': rate})
+        else:
+            print(f"Expresion {index+1} '{infix}': {count} cadenas en {seconds:.3f}s ({accepted} aceptadas)", file=sys.stderr)
+        self.output.flush()
+
+
+    # Informa que una expresion no se pudo compilar o evaluar
+    def error(self, index, infix, error):
+
+        if self.format == 'jsonl':
+            self.write_json({'type': 'error', 'pattern': index+1, 'regex': infix, 'error': str(error)})
+            self.output.flush()
+        else:
+            print(f"Expresion {index+1} '{infix}': {error}", file=sys.stderr)
+
+
+
+# Compila y evalua cada expresion contra todas las cadenas de subjects() en un pipeline: mientras se
+# evaluan las cadenas de una expresion, un hilo compila las siguientes prefetch expresiones.
+# make_budget() crea el presupuesto (CompileBudget) de cada expresion y cache es el PatternCache del
+# motor 'compiled'. Las expresiones que no se pueden compilar o evaluar se reportan con writer.error y
+# se omiten. Si la salida se cierra (por ejemplo, un '| head') se deja de evaluar.
+# Retorna la cantidad de expresiones con error.
+def run_pipeline(patterns, subjects, writer, make_budget, cache, stages=(), engine='compiled', construction='thompson',
+                 fallback='lazy', prefetch=1, utf8=False, workers=1, chunk_size=DEFAULT_BLOCK_SIZE, renderer=None):
+
+    if prefetch < 0:
+        raise ValueError("prefetch no puede ser negativo")
+
+    failures = 0
+    patterns = enumerate(patterns)
+    pending = deque()   # Cola de (indice, expresion, presupuesto, future de compile_pattern) en orden
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+
+        # Envia la siguiente expresion al hilo de compilacion, si quedan
+        def submit_next():
+            for index, infix in patterns:
+                budget = make_budget()
+                future = pool.submit(compile_pattern, infix, stages, engine, construction, budget, fallback, cache)
+                pending.append((index, infix, budget, future))
+                return
+
+        for _ in range(prefetch + 1):
+            submit_next()
+
+        while pending:
+            index, infix, budget, future = pending.popleft()
+            submit_next()
+            try:
+                built, matcher, _ = future.result()
+            except Exception as error:
+                writer.error(index, infix, error)
+                failures += 1
+                continue
+
+            count = 0
+            accepted = 0
+            try:
+                writer.pattern(index, infix, budget)
+                if renderer:
+                    render_pattern(renderer, index, built, stages)
+
+                start = time.perf_counter()
+                for w, is_accepted in match_strings(matcher, subjects(), utf8, workers, chunk_size):
+                    writer.match(index, w, is_accepted)
+                    count += 1
+                    accepted += bool(is_accepted)
+                writer.summary(index, infix, count, accepted, time.perf_counter() - start)
+            except BrokenPipeError:
+                # La salida se cerro: no se puede escribir el error ahi ni seguir evaluando
+                print(f"Expresion {index+1} '{infix}': la salida se cerro despues de {count} cadenas", file=sys.stderr)
+                for _, _, _, future in pending:
+                    future.cancel()
+                return failures + 1
+            except Exception as error:
+                writer.error(index, infix, error)
+                failures += 1
+
+    return failures
+
+
+# Valida que un argumento sea un entero no negativo
+def non_negative_int(text):
+
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"debe ser 0 o mayor: {text}")
+    return value
+
+
+# Valida que un argumento sea un entero mayor que cero
+def positive_int(text):
+
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser 1 o mayor: {text}")
+    return value
+
+
+# Punto de entrada: lee los argumentos, ejecuta el pipeline y retorna el codigo de salida
+# (1 si alguna expresion no se pudo compilar o evaluar)
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Compila expresiones regulares y evalua cadenas sin interaccion, con resultados legibles por programas")
+    parser.add_argument('-p', '--patterns', metavar='ARCHIVO',
+                        help="archivo con una expresion por linea; '-' es la entrada estandar (por defecto regex.txt)")
+    parser.add_argument('-e', '--regex', action='append', metavar='EXPRESION',
+                        help="expresion a evaluar; se puede repetir y reemplaza a --patterns")
+    parser.add_argument('-i', '--input', metavar='ARCHIVO',
+                        help="archivo con una cadena por linea; '-' es la entrada estandar. Sin --input solo se compilan las expresiones")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=[], metavar='ETAPA',
+                        help=f"representaciones a construir y reportar ademas de las que necesita el motor: {', '.join(STAGES)}")
+    parser.add_argument('--engine', choices=list(MATCH_ENGINES), default='compiled',
+                        help="motor para evaluar las cadenas (por defecto compiled, la tabla del AFD minimizado)")
+    parser.add_argument('--construction', choices=CONSTRUCTIONS, default='thompson',
+                        help="metodo para construir los AFD (por defecto thompson)")
+    parser.add_argument('--utf8', action='store_true',
+                        help="evaluar las cadenas como bytes; el motor compiled usa automatas sobre UTF-8")
+    parser.add_argument('--workers', type=positive_int, default=1, metavar='N',
+                        help="procesos para evaluar las cadenas con el motor compiled (por defecto 1)")
+    parser.add_argument('--chunk-size', type=positive_int, default=DEFAULT_BLOCK_SIZE, metavar='N',
+                        help=f"cadenas por bloque con el motor compiled (por defecto {DEFAULT_BLOCK_SIZE})")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help=f"directorio del cache de automatas compilados (por defecto {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="no leer ni escribir el cache de automatas en disco")
+    parser.add_argument('--mmap', action='store_true',
+                        help="cargar los automatas del cache en disco con mmap, sin copiarlos")
+    parser.add_argument('--max-states', type=int, default=DEFAULT_MAX_STATES, metavar='N',
+                        help=f"limite de estados del AFN o AFD de cada expresion (por defecto {DEFAULT_MAX_STATES})")
+    parser.add_argument('--max-seconds', type=float, metavar='S',
+                        help="tiempo maximo de compilacion de cada expresion (por defecto sin limite)")
+    parser.add_argument('--max-memory', type=float, metavar='MB',
+                        help="memoria adicional maxima para compilar cada expresion (por defecto sin limite)")
+    parser.add_argument('--fallback', choices=FALLBACKS + ('none',), default='lazy',
+                        help="motor para las expresiones que exceden los limites, o ninguno (por defecto lazy)")
+    parser.add_argument('--prefetch', type=non_negative_int, default=1, metavar='N',
+                        help="expresiones que se compilan por adelantado mientras se evalua la actual (por defecto 1)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='jsonl',
+                        help="formato de salida: un objeto JSON por linea o columnas separadas por tabuladores (por defecto jsonl)")
+    parser.add_argument('--matches-only', action='store_true',
+                        help="escribir solo las cadenas aceptadas")
+    parser.add_argument('-o', '--output', metavar='ARCHIVO',
+                        help="archivo de salida (por defecto la salida estandar)")
+    parser.add_argument('--render', choices=FORMATS, metavar='FORMATO',
+                        help=f"dibujar las etapas de --stages sin abrir el visor, en uno de: {', '.join(FORMATS)}")
+    parser.add_argument('--render-dir', default='.', metavar='DIR',
+                        help="directorio de los graficos (por defecto el actual)")
+    parser.add_argument('--max-render-nodes', type=int, default=DEFAULT_MAX_NODES, metavar='N',
+                        help=f"los graficos con mas nodos se reemplazan por un resumen; 0 es sin limite (por defecto {DEFAULT_MAX_NODES})")
+    args = parser.parse_args(argv)
+
+    if args.regex:
+        patterns = [infix.strip().replace(" ", "") for infix in args.regex]
+    else:
+        patterns = read_patterns(args.patterns or 'regex.txt')
+    if args.patterns == '-' and args.input == '-' and not args.regex:
+        parser.error("--patterns y --input no pueden leer ambos de la entrada estandar")
+    subjects = subject_reader(args.input, args.utf8) if args.input else (lambda: iter(()))
+
+    cache = PatternCache(None if args.no_cache else args.cache_dir, mapped=args.mmap, utf8=args.utf8,
+                         construction=args.construction, max_states=args.max_states)
+    max_memory = None if args.max_memory is None else int(args.max_memory * 2**20)
+    make_budget = lambda: CompileBudget(args.max_states, args.max_seconds, max_memory)
+    fallback = None if args.fallback == 'none' else args.fallback
+
+    renderer = None
+    if args.render:
+        renderer = GraphRenderer(args.render_dir, args.render, False, args.max_render_nodes or None)
+
+    # Las cadenas en bytes que no son UTF-8 valido se escriben sin cambios en el formato tsv
+    if args.output:
+        output = io.open(args.output, 'w', encoding='utf-8', errors='surrogateescape')
+    else:
+        output = sys.stdout
+        output.reconfigure(errors='surrogateescape')
+    try:
+        writer = ResultWriter(output, args.format, args.matches_only)
+        failures = run_pipeline(patterns, subjects, writer, make_budget, cache, args.stages, args.engine,
+                                args.construction, fallback, args.prefetch, args.utf8, args.workers,
+                                args.chunk_size, renderer)
+    finally:
+        if renderer:
+            renderer.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+
+    sys.exit(main())
@@ -0,0 +1,338 @@
+import os
+import re
+import sys
+import random
+import argparse
+import tempfile
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import thompson_from_tree, simulate_afn
+from AFDsimulator import convert_to_afd, minimize_afd, simulate_afd
+from AFDcompiler import MappedAFD, build_afn, compile_regex
+from bitsetAFN import BitsetAFN
+from lazyAFD import LazyAFD
+from flatAFN import FlatAFN
+from directAFD import direct_afd
+from batchMatcher import match_batch, match_batch_parallel
+from searchAFD import Searcher
+from streamMatcher import AFDStreamMatcher, AFNStreamMatcher
+from multiPattern import compile_patterns
+from patternCache import PatternCache, normalize_regex
+
+# Simbolos de las cadenas de entrada: los de las expresiones, uno que ninguna nombra, '.', que las
+# expresiones solo nombran escapado, y uno de varios bytes en UTF-8
+SUBJECT_ALPHABET = 'abcd.é'
+
+# Cadenas que no son UTF-8 valido; los automatas sobre bytes deben rechazarlas
+INVALID_UTF8 = [b'\xff', b'a\x80', b'\xc3']
+
+# Cada cuantas expresiones se revisa tambien match_batch_parallel (iniciar los procesos es lento)
+PARALLEL_EVERY = 10
+
+# Textos por expresion en que se revisa la busqueda (la referencia por fuerza bruta es cubica)
+SEARCH_TEXTS = 5
+
+# Cuantificadores anidados que se generan como maximo (ver random_regex)
+MAX_NESTED_QUANTIFIERS = 2
+
+
+# Genera una expresion aleatoria con concatenacion, union, '*', '+', '?', repeticiones {m}, {m,} y {m,n},
+# clases, '.', '\.' y ε. Las expresiones son tambien validas para el modulo re si se quita ε.
+# quantifiers es la cantidad de cuantificadores que la contienen: con mas de MAX_NESTED_QUANTIFIERS
+# anidados el backtracking de re puede ser exponencial, asi que dentro de ellos solo se generan
+# simbolos y clases.
+def random_regex(rng, depth=0, quantifiers=0):
+
+    kind = rng.randint(0, 7) if depth < 4 else rng.choice([0, 0, 5])
+    if quantifiers >= MAX_NESTED_QUANTIFIERS and kind in (3, 4, 6, 7):
+        kind = rng.choice([0, 5])
+    inner = quantifiers + 1
+    if kind == 0:
+        return rng.choice('abc')
+    if kind == 1:
+        return random_regex(rng, depth+1, quantifiers) + random_regex(rng, depth+1, quantifiers)
+    if kind == 2:
+        return '(' + random_regex(rng, depth+1, quantifiers) + '|' + random_regex(rng, depth+1, quantifiers) + ')'
+    if kind == 3:
+        return '(' + random_regex(rng, depth+1, inner) + ')*'
+    if kind == 4:
+        return '(' + random_regex(rng, depth+1, inner) + ')?'
+    if kind == 6:
+        return '(' + random_regex(rng, depth+1, inner) + ')+' if rng.random() < 0.5 else rng.choice('abc') + '+'
+    if kind == 7:
+        low = rng.randint(0, 3)
+        count = rng.choice([f'{{{low}}}', f'{{{low},}}', f'{{{low},{low + rng.randint(0, 3)}}}'])
+        return '(' + random_regex(rng, depth+1, inner) + ')' + count if rng.random() < 0.6 else rng.choice('abc') + count
+    return rng.choice(['[ab]', '[a-c]', '.', '[^a]', '\\.', 'ε'])
+
+
+# Genera una cadena aleatoria de hasta max_length simbolos de SUBJECT_ALPHABET
+def random_subject(rng, max_length):
+
+    return ''.join(rng.choice(SUBJECT_ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+# Divide los datos en bloques de 0 a 3 elementos
+def random_chunks(rng, data):
+
+    chunks = []
+    i = 0
+    while i < len(data):
+        size = rng.randint(0, 3)
+        chunks.append(data[i:i + size])
+        i += size
+    return chunks
+
+
+# Reconoce la cadena con un reconocedor por flujo (StreamMatcher), entregandola en bloques aleatorios
+# de texto o de bytes UTF-8 (siempre bytes con binary=True); los bloques pueden partir un caracter
+def stream_accepts(matcher, w, rng, binary=False):
+
+    matcher.reset()
+    data = w.encode('utf-8') if binary or rng.random() < 0.5 else w
+    for chunk in random_chunks(rng, data):
+        matcher.feed(chunk)
+    return matcher.finish()
+
+
+# Compila la expresion con el modulo re, que sirve de referencia
+def reference_regex(infix):
+
+    return re.compile(infix.replace('ε', ''), re.DOTALL)
+
+
+# Construye todos los reconocedores de una expresion. Retorna (tamaños, reconocedores, lotes, utf8):
+# tamaños es un diccionario nombre -> estados de un AFD minimizado, reconocedores una lista de (nombre,
+# funcion que recibe la cadena y retorna si la acepta), lotes una lista de (nombre, funcion que recibe
+# la lista de cadenas y retorna la lista de resultados) y utf8 el AFD compilado sobre bytes UTF-8.
+# Con parallel=True se incluye match_batch_parallel.
+def build_matchers(infix, rng, parallel=False):
+
+    postfix = ShuntingYard().infixToPostfix(infix)
+    root = SyntaxTree().build_tree(postfix)
+    thompson = thompson_from_tree(root)
+    afd = convert_to_afd(thompson)
+    hopcroft = minimize_afd(afd)
+    moore = minimize_afd(afd, method='moore')
+    compiled = compile_regex(infix)
+    direct = compile_regex(infix, construction='direct')
+    utf8 = compile_regex(infix, utf8=True)
+    bitset = BitsetAFN(thompson)
+
+    sizes = {'hopcroft': len(hopcroft.states), 'moore': len(moore.states),
+             'compiled_thompson': compiled.num_states, 'compiled_direct': direct.num_states}
+    matchers = [
+        ('simulate_afn', lambda w: simulate_afn(thompson, w)),
+        ('simulate_afd', lambda w: simulate_afd(afd, w)),
+        ('hopcroft', lambda w: simulate_afd(hopcroft, w)),
+        ('moore', lambda w: simulate_afd(moore, w)),
+        ('compiled', compiled.accepts),
+        ('direct_afd', lambda w, afd=direct_afd(root): simulate_afd(afd, w)),
+        ('compiled_direct', direct.accepts),
+        ('bitset', bitset.accepts),
+        ('lazy', LazyAFD(bitset).accepts),
+        ('lazy_flushing', LazyAFD(bitset, max_states=2).accepts),
+        ('flat_tree', FlatAFN.from_tree(root).accepts),
+        ('flat_postfix', FlatAFN.from_postfix(postfix).accepts),
+        ('AFDStreamMatcher', lambda w, stream=AFDStreamMatcher(compiled): stream_accepts(stream, w, rng)),
+        ('AFNStreamMatcher', lambda w, stream=AFNStreamMatcher(bitset): stream_accepts(stream, w, rng)),
+        ('utf8', lambda w: utf8.accepts(w.encode('utf-8'))),
+        ('utf8_stream', lambda w, stream=AFDStreamMatcher(utf8): stream_accepts(stream, w, rng, binary=True)),
+    ]
+    # AFN sin transiciones epsilon (reducido y de posiciones) y las tablas construidas con ellos
+    for construction in ('reduced', 'glushkov'):
+        afn = build_afn(root, construction)
+        table = compile_regex(infix, construction=construction)
+        sizes[f'compiled_{construction}'] = table.num_states
+        matchers.append((f'afn_{construction}', lambda w, afn=afn: simulate_afn(afn, w)))
+        matchers.append((f'bitset_{construction}', BitsetAFN(afn).accepts))
+        matchers.append((f'compiled_{construction}', table.accepts))
+    batches = [
+        ('match_batch', lambda strings: [accepted for _, accepted in match_batch(compiled, strings, rng.randint(1, 8))]),
+    ]
+    if parallel:
+        batches.append(('match_batch_parallel', lambda strings: [
+            accepted for _, accepted in match_batch_parallel(compiled, strings, 2, rng.randint(1, 8))]))
+    return sizes, matchers, batches, utf8
+
+
+# Busca por fuerza bruta las coincidencias sin solapamiento de la expresion de re: desde cada posicion,
+# la que empieza mas a la izquierda y, entre ellas, la mas larga; despues de una vacia se avanza un simbolo.
+# Retorna la lista de intervalos (inicio, fin), como Searcher.finditer.
+def leftmost_longest(regex, text):
+
+    matches = []
+    pos = 0
+    while pos <= len(text):
+        found = None
+        for start in range(pos, len(text) + 1):
+            ends = [end for end in range(start, len(text) + 1) if regex.fullmatch(text, start, end)]
+            if ends:
+                found = (start, max(ends))
+                break
+        if found is None:
+            break
+        matches.append(found)
+        pos = found[1] if found[1] > found[0] else found[1] + 1
+    return matches
+
+
+# Compara Searcher.finditer con la busqueda por fuerza bruta en SEARCH_TEXTS textos aleatorios, con el
+# limite de estados por defecto y con uno de 4 estados, que obliga a vaciar los caches de los AFD.
+# Retorna la lista de diferencias encontradas, como mensajes.
+def check_search(infix, expected_regex, rng, max_length):
+
+    afn = thompson_from_tree(SyntaxTree().build_tree(ShuntingYard().infixToPostfix(infix)))
+    searchers = [Searcher(afn), Searcher(afn, max_states=4)]
+    for _ in range(SEARCH_TEXTS):
+        text = random_subject(rng, max_length)
+        expected = leftmost_longest(expected_regex, text)
+        for searcher in searchers:
+            found = list(searcher.finditer(text))
+            if found != expected:
+                return [f"'{infix}' en '{text}': finditer retorna {found} y la fuerza bruta {expected}"]
+    return []
+
+
+# Reemplaza el archivo por su primera mitad, como si se hubiera cortado al escribirlo. Se escribe un
+# archivo nuevo, asi los automatas que todavia lo tienen cargado con mmap no se afectan.
+def truncate_file(path):
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path + '.tmp', 'wb') as file:
+        file.write(data[:len(data) // 2])
+    os.replace(path + '.tmp', path)
+
+
+# Compila la expresion con PatternCache en cache_dir y la vuelve a cargar con caches nuevos: desde el
+# archivo en disco, copiandolo y con mmap (MappedAFD), y despues de cortar el archivo, compilandola
+# otra vez con y sin mmap (un archivo cortado cuenta como no encontrado). Los AFD cargados deben
+# coincidir con expected (re.fullmatch) en strings.
+# Retorna la lista de diferencias encontradas, como mensajes.
+def check_cache(infix, strings, expected, cache_dir):
+
+    errors = []
+    PatternCache(cache_dir).get(infix)
+
+    loaded = PatternCache(cache_dir)
+    results = [('el cache en disco', loaded.get(infix))]
+    if loaded.disk_hits != 1:
+        errors.append(f"'{infix}': PatternCache no encontro la expresion en disco")
+
+    mapped = PatternCache(cache_dir, mapped=True)
+    results.append(('el cache con mmap', mapped.get(infix)))
+    if not isinstance(results[-1][1], MappedAFD):
+        errors.append(f"'{infix}': PatternCache con mapped=True no cargo un MappedAFD")
+
+    for mapped_load in (False, True):
+        truncated = PatternCache(cache_dir, mapped=mapped_load)
+        truncate_file(truncated.path_for(normalize_regex(infix)))
+        results.append(('el cache con el archivo cortado' + (' y mmap' if mapped_load else ''), truncated.get(infix)))
+        if truncated.misses != 1:
+            errors.append(f"'{infix}': PatternCache uso un archivo cortado" + (" con mmap" if mapped_load else ""))
+
+    for name, compiled in results:
+        if [bool(compiled.accepts(w)) for w in strings] != expected:
+            errors.append(f"'{infix}': el AFD de {name} no coincide con re.fullmatch en {strings}")
+    return errors
+
+
+# Compara todos los reconocedores de una expresion con re.fullmatch en subjects cadenas aleatorias,
+# y la busqueda con la fuerza bruta (ver check_search). parallel indica si se revisa match_batch_parallel
+# y, si se da cache_dir, se revisa PatternCache en ese directorio (ver check_cache).
+# Retorna la lista de diferencias encontradas, como mensajes.
+def check_regex(infix, rng, subjects, max_length, parallel=False, cache_dir=None):
+
+    errors = []
+    expected_regex = reference_regex(infix)
+    try:
+        sizes, matchers, batches, utf8 = build_matchers(infix, rng, parallel)
+    except Exception as error:
+        return [f"'{infix}': no se pudo compilar: {error}"]
+
+    # El AFD minimo es unico: Hopcroft y Moore deben dar los mismos estados, y cada construccion la
+    # misma tabla compilada
+    if sizes['hopcroft'] != sizes['moore']:
+        errors.append(f"'{infix}': Hopcroft tiene {sizes['hopcroft']} estados y Moore {sizes['moore']}")
+    compiled_sizes = {name: size for name, size in sizes.items() if name.startswith('compiled_')}
+    if len(set(compiled_sizes.values())) > 1:
+        errors.append(f"'{infix}': las construcciones dan tablas de distinto tamaño: {compiled_sizes}")
+
+    strings = [random_subject(rng, max_length) for _ in range(subjects)]
+    expected = [expected_regex.fullmatch(w) is not None for w in strings]
+    for w, accepted in zip(strings, expected):
+        for name, accepts in matchers:
+            if bool(accepts(w)) != accepted:
+                errors.append(f"'{infix}' con '{w}': {name} retorna {not accepted} y re.fullmatch {accepted}")
+        if errors:
+            return errors
+
+    for name, match_all in batches:
+        if [bool(result) for result in match_all(strings)] != expected:
+            errors.append(f"'{infix}': {name} no coincide con re.fullmatch en {strings}")
+
+    for data in INVALID_UTF8:
+        if utf8.accepts(data):
+            errors.append(f"'{infix}': el automata sobre UTF-8 acepta {data!r}, que no es UTF-8 valido")
+
+    errors.extend(check_search(infix, expected_regex, rng, max_length))
+    if cache_dir is not None:
+        errors.extend(check_cache(infix, strings, expected, cache_dir))
+    return errors
+
+
+# Compila grupos de expresiones con compile_patterns y compara los patrones aceptados por el AFD
+# combinado con los que acepta re.fullmatch para cada cadena
+def check_patterns(infixes, rng, subjects, max_length):
+
+    compiled = compile_patterns(infixes)
+    expected_regexes = [reference_regex(infix) for infix in infixes]
+    for _ in range(subjects):
+        w = random_subject(rng, max_length)
+        expected = tuple(i for i, regex in enumerate(expected_regexes) if regex.fullmatch(w))
+        if compiled.matches(w) != expected:
+            return [f"{infixes} con '{w}': compile_patterns retorna {compiled.matches(w)} y re.fullmatch {expected}"]
+    return []
+
+
+# Revisa seeds expresiones aleatorias, una por semilla (y match_batch_parallel cada PARALLEL_EVERY),
+# con un cache de AFD compilados en un directorio temporal, y grupos de group_size expresiones para
+# compile_patterns. Escribe cada diferencia y retorna la cantidad.
+def run_checks(seeds, subjects, max_length, group_size):
+
+    failures = 0
+    group = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for seed in range(seeds):
+            rng = random.Random(seed)
+            infix = random_regex(rng)
+            for error in check_regex(infix, rng, subjects, max_length, seed % PARALLEL_EVERY == 0, cache_dir):
+                print(error)
+                failures += 1
+
+            group.append(infix)
+            if len(group) == group_size:
+                for error in check_patterns(group, rng, subjects, max_length):
+                    print(error)
+                    failures += 1
+                group = []
+    return failures
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Compara la minimizacion y cada motor con re.fullmatch en expresiones aleatorias")
+    parser.add_argument('--seeds', type=int, default=300, metavar='N',
+                        help="cantidad de expresiones aleatorias, una por semilla (por defecto 300)")
+    parser.add_argument('--subjects', type=int, default=40, metavar='N',
+                        help="cadenas aleatorias por expresion (por defecto 40)")
+    parser.add_argument('--length', type=int, default=9, metavar='N',
+                        help="longitud maxima de las cadenas (por defecto 9)")
+    parser.add_argument('--group-size', type=int, default=3, metavar='N',
+                        help="expresiones por grupo para compile_patterns (por defecto 3)")
+    args = parser.parse_args()
+
+    failures = run_checks(args.seeds, args.subjects, args.length, args.group_size)
+    print(f"{args.seeds} expresiones revisadas, {failures} diferencias")
+    sys.exit(1 if failures else 0)
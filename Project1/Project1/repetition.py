@@ -0,0 +1,84 @@
+# Clase que representa el operador de repeticion acotada {m}, {m,} o {m,n}.
+# maximum es None cuando no hay limite superior ({m,}).
+class Repetition:
+
+    def __init__(self, minimum, maximum, text=None):
+
+        self.minimum = minimum      # Cantidad minima de repeticiones
+        self.maximum = maximum      # Cantidad maxima de repeticiones, o None si no hay limite
+        self.text = text if text is not None else repetition_text(minimum, maximum)
+
+
+    # Cantidad de copias del operando que necesita la construccion: las obligatorias mas las
+    # opcionales; con {m,} la ultima copia obligatoria se repite (o una sola con '*' si m es 0)
+    def copies(self):
+
+        if self.maximum is None:
+            return max(self.minimum, 1)
+        return self.maximum
+
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Repetition):
+            return NotImplemented
+        return self.minimum == other.minimum and self.maximum == other.maximum
+
+
+    def __hash__(self):
+
+        return hash((self.minimum, self.maximum))
+
+
+    def __str__(self):
+
+        return self.text
+
+
+    def __repr__(self):
+
+        return f"Repetition({self.text!r})"
+
+
+
+# Genera el texto del operador, por ejemplo {3}, {3,} o {3,5}
+def repetition_text(minimum, maximum):
+
+    if maximum is None:
+        return f"{{{minimum},}}"
+    if maximum == minimum:
+        return f"{{{minimum}}}"
+    return f"{{{minimum},{maximum}}}"
+
+
+# Lee los digitos que empiezan en regex[i]; retorna el numero (None si no hay digitos) y la posicion siguiente
+def parse_number(regex, i):
+
+    start = i
+    while i < len(regex) and '0' <= regex[i] <= '9':
+        i += 1
+    return (int(regex[start:i]) if i > start else None), i
+
+
+# Lee un operador de repeticion que empieza en regex[start] == '{'.
+# Retorna la repeticion y la posicion siguiente al '}' de cierre, o None si el texto no tiene la
+# forma {m}, {m,} o {m,n}; en ese caso el '{' es un caracter literal (por ejemplo en 'a{' o '{x}').
+def parse_repetition(regex, start):
+
+    minimum, i = parse_number(regex, start + 1)
+    if minimum is None or i >= len(regex):
+        return None
+
+    if regex[i] == '}':
+        maximum = minimum
+    elif regex[i] == ',':
+        maximum, i = parse_number(regex, i + 1)
+        if i >= len(regex) or regex[i] != '}':
+            return None
+    else:
+        return None
+
+    if maximum is not None and maximum < minimum:
+        raise Exception("Invalid expression")
+
+    return Repetition(minimum, maximum, regex[start:i + 1]), i + 1
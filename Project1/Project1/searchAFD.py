@@ -0,0 +1,228 @@
+from shuntingYard import ShuntingYard
+from syntaxTree import SyntaxTree
+from AFNsimulator import thompson_from_tree
+from bitsetAFN import BitsetAFN
+from lazyAFD import LazyAFDState
+
+
+# Clase que construye bajo demanda los estados de un AFD sobre un BitsetAFN y recuerda sus transiciones.
+# Al llenarse el cache se vacian tambien las transiciones de los estados que tenia, asi los estados
+# anteriores dejan de ser alcanzables y la memoria queda limitada por max_states.
+class CachedAFD:
+
+    def __init__(self, bitset_afn, max_states=10000):
+
+        self.afn = bitset_afn
+        self.max_states = max_states
+        self.cache = {}
+        self.flushes = 0            # Numero de veces que se vacio el cache
+        self.dead_state = LazyAFDState(0, False)
+        self.start_state = self.get_state(self.initial_mask())
+
+
+    # Conjunto de estados del AFN del estado inicial
+    def initial_mask(self):
+
+        return self.afn.start_mask
+
+
+    # Indica si el estado del AFD con ese conjunto de estados del AFN es final
+    def is_accepting(self, mask):
+
+        return self.afn.is_accepting(mask)
+
+
+    # Conjunto de estados del AFN alcanzable desde mask con un simbolo
+    def next_mask(self, mask, symbol):
+
+        return self.afn.step(mask, symbol)
+
+
+    # Retorna el estado del AFD para un conjunto de estados del AFN, creandolo si no existe
+    def get_state(self, mask):
+
+        if not mask:
+            return self.dead_state
+
+        state = self.cache.get(mask)
+        if state is None:
+            if len(self.cache) >= self.max_states:
+                self.flush()
+            state = LazyAFDState(mask, self.is_accepting(mask))
+            self.cache[mask] = state
+        return state
+
+
+    # Vacia el cache y las transiciones de sus estados; solo se conserva el estado inicial
+    def flush(self):
+
+        for state in self.cache.values():
+            state.transitions.clear()
+        self.dead_state.transitions.clear()
+        self.cache = {self.start_state.mask: self.start_state}
+        self.flushes += 1
+
+
+    # Transicion desde un estado con un simbolo
+    def step(self, state, symbol):
+
+        next_state = state.transitions.get(symbol)
+        if next_state is None:
+            next_state = self.get_state(self.next_mask(state.mask, symbol))
+            state.transitions[symbol] = next_state
+        return next_state
+
+
+
+# Clase que recorre un texto de derecha a izquierda calculando en cada posicion i el conjunto de estados
+# del AFN desde los que alguna subcadena text[i:k] lleva a un estado final ("estados vivos").
+# Los conjuntos se construyen bajo demanda como estados de un AFD (ver CachedAFD). Un estado es final
+# si contiene el estado inicial del AFN, es decir, si en esa posicion empieza una coincidencia.
+class LiveAFD(CachedAFD):
+
+    def __init__(self, bitset_afn, max_states=10000):
+
+        # Para cada estado r, mapa de bits de los estados cuyo cierre epsilon contiene a r
+        closures = bitset_afn.closures
+        self.co_closures = [0] * len(closures)
+        for i, closure in enumerate(closures):
+            while closure:
+                low = closure & -closure
+                self.co_closures[low.bit_length() - 1] |= 1 << i
+                closure ^= low
+        super().__init__(bitset_afn, max_states)
+
+
+    # Estados cuyo cierre epsilon contiene alguno de los estados de mask
+    def co_closure(self, mask):
+
+        co_closures = self.co_closures
+        result = 0
+        while mask:
+            low = mask & -mask
+            result |= co_closures[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+
+    # Al final del texto solo estan vivos los estados que alcanzan un final con epsilon
+    def initial_mask(self):
+
+        return self.co_closure(self.afn.final_mask)
+
+
+    def is_accepting(self, mask):
+
+        return bool(mask & 1)
+
+
+    # Estados vivos antes de symbol a partir de los estados vivos despues de el (mask)
+    def next_mask(self, mask, symbol):
+
+        afn = self.afn
+        symbol = afn.alphabet.classify(symbol)
+        targets = afn.final_mask
+        active = afn.sources.get(symbol, 0)
+        successors = afn.successors.get(symbol)
+        while active:
+            low = active & -active
+            if successors[low.bit_length() - 1] & mask:
+                targets |= low
+            active ^= low
+        return self.co_closure(targets)
+
+
+
+# Clase para buscar coincidencias de una expresion dentro de un texto, con semantica
+# leftmost-longest (la coincidencia que empieza mas a la izquierda y, entre ellas, la mas larga).
+#   1. Un AFD de estados vivos (LiveAFD) recorre el texto una vez de derecha a izquierda; marca las
+#      posiciones donde empieza alguna coincidencia y guarda los estados vivos de cada posicion.
+#   2. Desde cada inicio elegido, un AFD anclado recorre hacia adelante solo mientras alguno de sus
+#      estados siga vivo, es decir, mientras todavia pueda haber una coincidencia mas larga.
+# Cada recorrido hacia adelante termina un simbolo despues del final de su coincidencia, asi el texto
+# se recorre un numero constante de veces: no hay retroceso ni se reinicia la busqueda en cada posicion.
+class Searcher:
+
+    def __init__(self, afn, max_states=10000):
+
+        bitset_afn = BitsetAFN(afn)
+        self.forward = CachedAFD(bitset_afn, max_states)
+        self.live = LiveAFD(bitset_afn, max_states)
+
+
+    # Construye el buscador a partir de una expresion infix
+    @staticmethod
+    def from_regex(infix):
+
+        postfix = ShuntingYard().infixToPostfix(infix)
+        root = SyntaxTree().build_tree(postfix)
+        return Searcher(thompson_from_tree(root))
+
+
+    # Recorre el texto de derecha a izquierda. Retorna un bytearray de longitud len(text) + 1 con 1 en
+    # cada posicion donde empieza una coincidencia, y la lista de estados vivos de cada posicion.
+    def match_starts(self, text):
+
+        live = self.live
+        starts = bytearray(len(text) + 1)
+        masks = [0] * (len(text) + 1)
+
+        state = live.start_state
+        starts[len(text)] = state.is_final
+        masks[len(text)] = state.mask
+        for i in range(len(text) - 1, -1, -1):
+            state = live.step(state, text[i])
+            starts[i] = state.is_final
+            masks[i] = state.mask
+        return starts, masks
+
+
+    # Retorna el final de la coincidencia mas larga que empieza en start (o -1 si no hay).
+    # live_masks son los estados vivos de cada posicion (ver match_starts).
+    def longest_match(self, text, start, live_masks):
+
+        forward = self.forward
+        state = forward.start_state
+        end = -1
+        i = start
+        while state.mask & live_masks[i]:
+            if state.is_final:
+                end = i
+            if i == len(text):
+                break
+            state = forward.step(state, text[i])
+            i += 1
+        return end
+
+
+    # Genera los intervalos (inicio, fin) de las coincidencias sin solapamiento, de izquierda a derecha.
+    # Despues de una coincidencia vacia la busqueda continua en la posicion siguiente.
+    def finditer(self, text, pos=0):
+
+        starts, live_masks = self.match_starts(text)
+        while pos <= len(text):
+            start = starts.find(1, pos)
+            if start < 0:
+                return
+            end = self.longest_match(text, start, live_masks)
+            yield (start, end)
+            pos = end if end > start else end + 1
+
+
+    # Retorna la primera coincidencia (inicio, fin) a partir de pos, o None si no hay
+    def search(self, text, pos=0):
+
+        return next(self.finditer(text, pos), None)
+
+
+
+# Busca la primera coincidencia de la expresion en el texto
+def search(searcher, text):
+
+    return searcher.search(text)
+
+
+# Genera todas las coincidencias de la expresion en el texto
+def finditer(searcher, text):
+
+    return searcher.finditer(text)
@@ -1,15 +1,13 @@
+from charClass import ANY, ESCAPE, parse_class, parse_escape
+from repetition import Repetition, parse_repetition
+
 # Define la clase Shunting Yard para la conversion de una expresion regular infix a postfix
 class ShuntingYard:
     
-    # Inicializa la lista de operadores validos
+    # Inicializa la lista de operadores validos y su precedencia
     def __init__(self):
         self.allOperators = ['|', '?', '+', '*', '^']
-
-
-    # Retorna la precedencia del operador dado, 0 si no se encuentra
-    def getPrecedence(self, c):
-        
-        precedence = {
+        self.precedence = {
             '(': 1,
             '|': 2,
             '^': 3,
@@ -17,114 +15,83 @@ class ShuntingYard:
             '*': 4,
             '+': 4,
         }
-        return precedence.get(c, 0)
-
-
-    # Convierte el operador '+' a su forma explicita, es decir, 'a+' pasa a ser 'aa*'
-    def plus_operator_convertion(self, regex):
-
-        i = 0
-        transformed_exp = ""
-
-        # Bucle que recorre la expresion regular
-        while i < len(regex):
-
-            # Si encuentra un '+' verifica el caracter anterior
-            if regex[i] == '+':
-                # si es un parentesis, busca el parentesis correspondiente y reemplaza por '*'
-                if regex[i-1] == ')':
-                    for j in range(i-1, -1, -1):
-                        if regex[j] == '(':
-                            transformed_exp += regex[j:i] + "*"
-                          
-                else:
-                    transformed_exp += regex[i-1] + '*'
-            else:
-                transformed_exp += regex[i]
-            i += 1
-        return transformed_exp
 
 
-    # Convierte la extension de expresion '?' a su forma explicita, es decir, 'a?' a 'a|ε'
-    def interrogation_operator_convertion(self, regex):
+    # Retorna la precedencia del operador dado, 0 si no se encuentra.
+    # Las repeticiones {m,n} tienen la misma precedencia que '*'.
+    def getPrecedence(self, c):
         
-        stack = []
-        openParentesis = []
-        i = 0
-
-        # Bucle que recorre la expresion regular
-        while i < len(regex):
-            # Si encuentra '?', verifica el caracter anterior
-            if regex[i] == '?':
-                # si es un parentesis, busca el parentesis correspondiente 
-                if regex[i-1] == ')':
-                    for j in range(i-1, -1, -1):
-                        if regex[j] == ')':
-                            stack.append(regex[j])
-                        elif regex[j] == '(':
-                            stack.pop()
-                            if not stack:
-                                openParentesis.append(j + 1)
-                                break
-                else:
-                    openParentesis.append(i - 1)
-            i += 1
-
-        transformed_exp = ""
+        if isinstance(c, Repetition):
+            return self.precedence['*']
+        return self.precedence.get(c, 0)
+
+
+    # Separa la expresion en simbolos en una sola pasada y en tiempo lineal: las clases entre corchetes
+    # y '.' se convierten en un solo simbolo CharClass, '\' convierte el caracter siguiente en literal
+    # (ver parse_escape), la concatenacion implicita se agrega como '^' al momento de leer cada simbolo,
+    # y los parentesis se verifican con un contador. Los operadores '+', '?' y las repeticiones {m,n}
+    # (objetos Repetition) se mantienen como simbolos; el arbol sintactico se encarga de ellos.
+    # Si los parentesis no estan balanceados se lanza una excepcion.
+    def tokenize(self, regex):
+
+        tokens = []
+        open_parens = 0         # Cantidad de '(' sin cerrar
+        previous = None         # Ultimo simbolo agregado (sin contar '^')
         i = 0
 
         while i < len(regex):
-            if i in openParentesis:
-                count = openParentesis.count(i)
-                transformed_exp += '(' * count + regex[i]
-
-            elif regex[i] == '?':
-                transformed_exp += '|ε)' #  reemplaza por '|ε'
-
+            char = regex[i]
+            if char == ESCAPE:
+                token, i = parse_escape(regex, i)
+            elif char == '[':
+                token, i = parse_class(regex, i)
+            elif char == '{' and (repetition := parse_repetition(regex, i)):
+                token, i = repetition
             else:
-                transformed_exp += regex[i]
+                token = ANY if char == '.' else char
+                i += 1
 
-            i += 1
+            # Concatenacion implicita: entre un operando (o ')' o un operador unario) y el inicio de
+            # un operando (o '(')
+            if (previous is not None and previous not in ('|', '(', '^') and
+                    token not in ('|', ')', '*', '+', '?') and not isinstance(token, Repetition)):
+                tokens.append('^')
 
-        return transformed_exp
+            if token == '(':
+                open_parens += 1
+            elif token == ')':
+                if not open_parens:
+                    raise Exception("Invalid expression")
+                open_parens -= 1
 
+            tokens.append(token)
+            previous = token
 
-    # Maneja la concatenacion implicita, transformandola en explicita usando ^
-    def concatenation_convertion(self, expression):
-       
-        new_expression = []
+        if open_parens:
+            raise Exception("Invalid expression")
 
-        # Bucle que recorre la expresion
-        for i in range(len(expression) - 1):
-            new_expression.append(expression[i])
+        return tokens
 
-            # si encuentra caracteres consecutivos que no sean operadores, agrega '^' entre caracteres
-            if (expression[i] not in ['|', '(', '^'] and 
-                expression[i+1] not in ['|', ')', '*', '+', '?']
-                ):
-                new_expression.append('^')
 
-        new_expression.append(expression[-1])
+    # Transforma la expresion a su forma explicita (simbolos y concatenacion '^') antes de hacer shunting yard.
+    # Retorna la lista de simbolos resultante.
+    def formatRegEx(self, regex):
 
-        return ''.join(new_expression)
+        return self.tokenize(regex)
 
 
-    # Hace uso de las conversiones para transformar la expresion a su forma explicita antes de hacer shunting yard
-    def formatRegEx(self, regex):
-        
-        regex = self.plus_operator_convertion(regex)
-        regex = self.interrogation_operator_convertion(regex)
-        regex = self.concatenation_convertion(regex)
+    # Convierte la expresion infix a formato postfix utilizando el algoritmo de Shunting Yard.
+    # Retorna la lista de simbolos en orden postfix (las clases de caracteres son objetos CharClass).
+    def infixToPostfix(self, regex):
 
-        return regex
+        return self.tokensToPostfix(self.formatRegEx(regex))
 
 
-    # Convierte la expresion infix a formato postfix utilizando el algoritmo de Shunting Yard
-    def infixToPostfix(self, regex):
+    # Aplica Shunting Yard sobre la lista de simbolos ya formateada (ver formatRegEx)
+    def tokensToPostfix(self, formattedRegEx):
         
         postfix = []
         stack = []
-        formattedRegEx = self.formatRegEx(regex)
 
         for c in formattedRegEx:
             if c == '(':
@@ -137,7 +104,7 @@ class ShuntingYard:
                 if stack:
                     stack.pop()  
 
-            elif c in self.allOperators:
+            elif c in self.allOperators or isinstance(c, Repetition):
                 while (stack and 
                        self.getPrecedence(stack[-1]) >= self.getPrecedence(c)
                        ):
@@ -151,4 +118,4 @@ class ShuntingYard:
         while stack:
             postfix.append(stack.pop())
 
-        return ''.join(postfix)
\ No newline at end of file
+        return postfix
\ No newline at end of file
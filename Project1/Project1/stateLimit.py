@@ -0,0 +1,80 @@
+from repetition import Repetition
+
+# Limite por defecto de estados del AFN o del AFD al compilar una expresion
+DEFAULT_MAX_STATES = 50000
+
+
+# Excepcion base de los limites de compilacion (estados, tiempo o memoria, ver CompileBudget)
+class BudgetError(Exception):
+    pass
+
+
+
+# Excepcion que indica que la construccion de un automata supero el limite de estados
+class StateLimitError(BudgetError):
+
+    def __init__(self, states, max_states):
+
+        super().__init__(f"La expresion excede el limite de {max_states} estados ({states} estados)")
+        self.states = states
+        self.max_states = max_states
+
+
+
+# Excepcion que indica que la compilacion supero el tiempo maximo
+class TimeLimitError(BudgetError):
+
+    def __init__(self, seconds, max_seconds):
+
+        super().__init__(f"La compilacion excede el limite de {max_seconds}s ({seconds:.3f}s)")
+        self.seconds = seconds
+        self.max_seconds = max_seconds
+
+
+
+# Excepcion que indica que la compilacion supero la memoria maxima
+class MemoryLimitError(BudgetError):
+
+    def __init__(self, used, max_memory):
+
+        super().__init__(f"La compilacion excede el limite de {max_memory} bytes de memoria ({used} bytes)")
+        self.used = used
+        self.max_memory = max_memory
+
+
+
+# Lanza StateLimitError si la cantidad de estados supera el limite (None es sin limite)
+def check_state_limit(states, max_states):
+
+    if max_states is not None and states > max_states:
+        raise StateLimitError(states, max_states)
+
+
+# Estima la cantidad de estados del AFN de Thompson de un arbol sintactico, expandiendo las
+# repeticiones, sin construirlo. El recorrido es iterativo (postorden).
+def estimate_states(root):
+
+    sizes = []
+    nodes_to_visit = [(root, False)]
+    while nodes_to_visit:
+        node, expanded = nodes_to_visit.pop()
+        if node.children and not expanded:
+            nodes_to_visit.append((node, True))
+            for child in reversed(node.children):
+                nodes_to_visit.append((child, False))
+            continue
+
+        if not node.children:
+            sizes.append(2)
+        elif isinstance(node.value, Repetition):
+            child = sizes.pop()
+            # Cada copia opcional (o el ciclo de {m,}) agrega un inicio y un fin
+            sizes.append(node.value.copies() * (child + 2) + 2)
+        elif len(node.children) == 1:
+            sizes.append(sizes.pop() + 2)
+        else:
+            right = sizes.pop()
+            left = sizes.pop()
+            sizes.append(left + right + 2)
+
+    return sizes[0]
@@ -0,0 +1,127 @@
+import codecs
+
+# Tamaño por defecto de los bloques leidos de archivos, tuberias o sockets
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+# Clase base de los reconocedores por flujo. La entrada llega por partes con feed(chunk) y el
+# resultado se obtiene con finish(). Los bloques pueden ser str, bytes, bytearray o memoryview;
+# los bloques binarios se decodifican de forma incremental, asi un caracter partido entre dos
+# bloques se reconoce correctamente. Entre bloques solo se guarda el estado actual.
+class StreamMatcher:
+
+    def __init__(self, encoding='utf-8'):
+
+        self.encoding = encoding
+        self.reset()
+
+
+    # Vuelve al estado inicial para reconocer una nueva entrada
+    def reset(self):
+
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        self.state = self.start()
+
+
+    # Procesa un bloque de la entrada
+    def feed(self, chunk):
+
+        if not isinstance(chunk, str):
+            chunk = self.decoder.decode(chunk)
+        if chunk and not self.is_dead(self.state):
+            self.state = self.advance(self.state, chunk)
+
+
+    # Termina la entrada y retorna True si es aceptada
+    def finish(self):
+
+        self.feed(self.decoder.decode(b'', final=True))
+        return self.is_accepting(self.state)
+
+
+
+# Reconocedor por flujo sobre un AFD compilado; el estado es un desplazamiento en la tabla
+class AFDStreamMatcher(StreamMatcher):
+
+    def __init__(self, compiled, encoding='utf-8'):
+
+        self.compiled = compiled
+        super().__init__(encoding)
+
+
+    # Un automata de bytes (ver utf8Automaton) consume los bloques binarios sin decodificarlos
+    def feed(self, chunk):
+
+        if not self.compiled.byte_mode:
+            super().feed(chunk)
+        elif not self.is_dead(self.state):
+            self.state = self.advance(self.state, chunk)
+
+
+    def start(self):
+
+        return self.compiled.start
+
+
+    def advance(self, state, text):
+
+        return self.compiled.run(state, self.compiled.to_columns(text))
+
+
+    # La fila 0 (desplazamiento 0) de la tabla es el estado muerto
+    def is_dead(self, state):
+
+        return state == 0
+
+
+    def is_accepting(self, state):
+
+        return self.compiled.is_accepting(state)
+
+
+
+# Reconocedor por flujo sobre un BitsetAFN; el estado es el conjunto de estados del AFN como mapa de bits
+class AFNStreamMatcher(StreamMatcher):
+
+    def __init__(self, bitset_afn, encoding='utf-8'):
+
+        self.afn = bitset_afn
+        super().__init__(encoding)
+
+
+    def start(self):
+
+        return self.afn.start_mask
+
+
+    def advance(self, state, text):
+
+        step = self.afn.step
+        for symbol in text:
+            state = step(state, symbol)
+            if not state:
+                break
+        return state
+
+
+    def is_dead(self, state):
+
+        return not state
+
+
+    def is_accepting(self, state):
+
+        return self.afn.is_accepting(state)
+
+
+
+# Reconoce todo el contenido de un objeto tipo archivo (texto o binario) leyendolo por bloques
+def match_stream(matcher, file, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    matcher.reset()
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        matcher.feed(chunk)
+    return matcher.finish()
@@ -1,9 +1,13 @@
 from graphviz import Digraph
+from repetition import Repetition
 
 # Clase que define los nodos del arbol sintactico.
 # Cada nodo tiene un valor y una lista de hijos.
+# Se usa __slots__ para que los arboles de expresiones muy largas ocupen menos memoria.
 class Node:
 
+    __slots__ = ('value', 'children')
+
     def __init__(self, value):
         self.value = value
         self.children = []
@@ -22,12 +26,13 @@ class SyntaxTree(object):
         for char in postfix:
 
             # Si el caracter es un operando, crea un nuevo nodo y lo agrega a la pila
-            if char not in '*|^':
+            if char not in ('*', '+', '?', '|', '^') and not isinstance(char, Repetition):
                 new_node = Node(char)
                 stack.append(new_node)
             
-            # Si el caracter es '*', crea un nuevo nodo y lo asigna como hijo del nodo anterior
-            elif char == '*':
+            # Si el caracter es '*', '+', '?' o una repeticion {m,n}, crea un nuevo nodo y lo asigna
+            # como hijo del nodo anterior
+            elif char in ('*', '+', '?') or isinstance(char, Repetition):
                 if len(stack) >= 1:
                     child = stack.pop()
                     new_node = Node(char)
@@ -37,7 +42,7 @@ class SyntaxTree(object):
                     raise Exception("Invalid expression")
 
             # Si el caracter es '|' o '^', crea un nuevo nodo y asigna los dos nodos anteriores como hijos
-            elif char in "|^":
+            elif char in ('|', '^'):
                 if len(stack) >= 2:
                     new_node = Node(char)
                     right_child = stack.pop()
@@ -53,6 +58,7 @@ class SyntaxTree(object):
 
 
     # Visualiza el arbol sintactico utilizando la libreria Graphviz.
+    # El recorrido usa una pila explicita, asi los arboles muy profundos no agotan la recursion.
     def visualize_tree(self, root, dot=None):
 
         # Inicializa el objeto Digraph si no se proporciona
@@ -61,12 +67,15 @@ class SyntaxTree(object):
 
         # Si el nodo raiz existe, procede a visualizar
         if root:
-             # Crea un nodo en el grafico para la raiz
+            # Crea un nodo en el grafico para la raiz
             dot.node(str(id(root)), str(root.value))
 
-            # Recorre cada hijo de la raiz y crea nodos y aristas en el grafico
-            for child in root.children:
-                dot.node(str(id(child)), str(child.value))
-                dot.edge(str(id(root)), str(id(child)))
-                self.visualize_tree(child, dot) # Llamada recursiva para visualizar subarboles
-        return dot
\ No newline at end of file
+            nodes_to_visit = [root]
+            while nodes_to_visit:
+                node = nodes_to_visit.pop()
+                # Recorre cada hijo del nodo y crea nodos y aristas en el grafico
+                for child in node.children:
+                    dot.node(str(id(child)), str(child.value))
+                    dot.edge(str(id(node)), str(id(child)))
+                    nodes_to_visit.append(child)
+        return dot
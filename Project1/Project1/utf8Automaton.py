@@ -0,0 +1,155 @@
+from array import array
+from charClass import CharClass
+from AFDcompiler import CompiledAFD
+
+# Mayor punto de codigo Unicode y rango de sustitutos (no se pueden codificar en UTF-8)
+MAX_CODEPOINT = 0x10FFFF
+SURROGATES = (0xD800, 0xDFFF)
+
+
+# Convierte un conjunto de puntos de codigo a una lista ordenada de rangos (inicio, fin) sin sustitutos
+def to_ranges(codes):
+
+    ranges = []
+    for code in sorted(codes):
+        if SURROGATES[0] <= code <= SURROGATES[1]:
+            continue
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return [tuple(r) for r in ranges]
+
+
+# Retorna los rangos complementarios a los caracteres dados dentro de todo Unicode, sin sustitutos
+def complement_ranges(chars):
+
+    ranges = []
+    start = 0
+    for low, high in to_ranges(ord(c) for c in chars) + [(SURROGATES[0], SURROGATES[1]), (MAX_CODEPOINT + 1, MAX_CODEPOINT + 1)]:
+        if low > start:
+            ranges.append((start, low - 1))
+        start = max(start, high + 1)
+    return ranges
+
+
+# Retorna los rangos de puntos de codigo cubiertos por una clave del alfabeto (caracter o CharClass)
+def key_ranges(key):
+
+    if isinstance(key, CharClass):
+        if key.negated:
+            return complement_ranges(key.chars)
+        return to_ranges(ord(c) for c in key.chars)
+    return to_ranges([ord(key)])
+
+
+# Divide un rango de puntos de codigo en secuencias de rangos de bytes UTF-8. Cada secuencia es
+# una lista de (byte_min, byte_max) por posicion, y cubre exactamente un subrango del original.
+def utf8_sequences(low, high):
+
+    pending = [(low, high)]
+    while pending:
+        low, high = pending.pop()
+
+        # Separar por longitud de la codificacion (1, 2, 3 o 4 bytes)
+        for limit in (0x7F, 0x7FF, 0xFFFF):
+            if low <= limit < high:
+                pending.append((limit + 1, high))
+                pending.append((low, limit))
+                break
+        else:
+            if high <= 0x7F:
+                yield [(low, high)]
+                continue
+
+            # Separar hasta que los bytes de continuacion cubran rangos completos o un solo valor
+            encoded_low = chr(low).encode('utf-8')
+            length = len(encoded_low)
+            for i in range(1, length):
+                mask = (1 << (6 * i)) - 1
+                if low & ~mask != high & ~mask:
+                    if low & mask != 0:
+                        pending.append(((low | mask) + 1, high))
+                        pending.append((low, low | mask))
+                        break
+                    if high & mask != mask:
+                        pending.append((high & ~mask, high))
+                        pending.append((low, (high & ~mask) - 1))
+                        break
+            else:
+                encoded_high = chr(high).encode('utf-8')
+                yield list(zip(encoded_low, encoded_high))
+
+
+# Compila un AFD sobre caracteres a un AFD sobre bytes UTF-8 (alfabeto de 256 simbolos).
+# Cada transicion por caracter se reemplaza por las secuencias de bytes de su codificacion. Los
+# estados intermedios (a mitad de un caracter) se comparten entre secuencias con el mismo resto,
+# y los bytes que se comportan igual en todos los estados se agrupan en una misma columna.
+def compile_utf8_afd(afd):
+
+    rows = {state: i + 1 for i, state in enumerate(afd.states)}    # Fila 0 es el estado muerto
+    byte_rows = [None] + [[0] * 256 for _ in afd.states]            # Fila -> destino por byte
+    nodes = {}                                                       # Resto de secuencias -> fila intermedia
+
+    # Crea (o reutiliza) la fila intermedia que consume los restos de secuencia dados
+    def node_for(tails):
+
+        key = frozenset(tails)
+        row = nodes.get(key)
+        if row is None:
+            row = len(byte_rows)
+            nodes[key] = row
+            byte_rows.append([0] * 256)
+            fill(byte_rows[row], tails)
+        return row
+
+    # Llena la fila con las secuencias (rangos de bytes, fila destino) que empiezan en ella
+    def fill(row, sequences):
+
+        # Separar el primer byte en intervalos elementales segun los limites de todos los rangos
+        bounds = sorted({s[0][0] for s, _ in sequences} | {s[0][1] + 1 for s, _ in sequences})
+        for low, high in zip(bounds, bounds[1:]):
+            tails = []
+            target = 0
+            for ranges, target_row in sequences:
+                if ranges[0][0] <= low and high - 1 <= ranges[0][1]:
+                    if len(ranges) == 1:
+                        target = target_row
+                    else:
+                        tails.append((ranges[1:], target_row))
+            if tails:
+                target = node_for(tails)
+            if target:
+                for byte in range(low, high):
+                    row[byte] = target
+
+    for state, row in rows.items():
+        sequences = []
+        for symbol, next_state in state.transitions.items():
+            for low, high in key_ranges(symbol):
+                for ranges in utf8_sequences(low, high):
+                    sequences.append((tuple(ranges), rows[next_state]))
+        if sequences:
+            fill(byte_rows[row], sequences)
+
+    # Agrupar los bytes con el mismo destino en todas las filas en una sola columna
+    byte_rows[0] = [0] * 256
+    signatures = {}
+    byte_columns = {}
+    for byte in range(256):
+        signature = tuple(byte_row[byte] for byte_row in byte_rows)
+        byte_columns[chr(byte)] = signatures.setdefault(signature, len(signatures))
+
+    num_columns = len(signatures) + 1
+    table = array('i', [0]) * (num_columns * len(byte_rows))
+    for signature, column in signatures.items():
+        for row, target in enumerate(signature):
+            table[row * num_columns + column] = target * num_columns
+
+    accept = bytearray((len(byte_rows) + 7) // 8)
+    for state, row in rows.items():
+        if state.is_final:
+            accept[row >> 3] |= 1 << (row & 7)
+
+    return CompiledAFD(byte_columns, num_columns, table, accept, rows[afd.start_state] * num_columns,
+                       byte_mode=True)